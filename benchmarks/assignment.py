@@ -0,0 +1,108 @@
+# benchmarks/assignment.py
+"""
+Doctor assignment throughput and queue balance under concurrent submissions.
+
+    DATABASE_NAME=mediconsult_bench python -m benchmarks.assignment --submissions 2000 --clients 32
+
+"auto" routes each request through create_auto_assigned_consultation (atomic
+least-loaded pick + $inc); "first" books whichever doctor sorts first in the
+directory, which is what hand-picking tends to do. For each strategy the run
+reports submissions/s, p50/p95 latency and how evenly the new requests were
+spread across the specialization's doctors. Benchmark consultations are
+deleted afterwards and the counters rebuilt.
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from config import USERS_COLLECTION, CONSULTATIONS_COLLECTION, SPECIALIZATIONS
+from benchmarks.queries import percentile
+
+def _consultation(patient_id, doctor_id, run_id):
+    now = datetime.utcnow()
+    return {
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "symptoms": "benchmark submission",
+        "status": "pending",
+        "benchmark_run": run_id,
+        "created_at": now,
+        "updated_at": now
+    }
+
+def run_strategy(db, strategy, specialization, submissions, clients):
+    from utils import create_consultation, create_auto_assigned_consultation, get_doctors_by_specialization
+
+    doctors = [doctor for doctor in get_doctors_by_specialization(specialization) if doctor.get("is_available")]
+    if not doctors:
+        raise SystemExit(f"No available {specialization} doctors - seed the database first")
+    run_id = ObjectId()
+    patient_ids = [ObjectId() for _ in range(max(1, submissions // 5))]
+
+    def submit(index):
+        patient_id = patient_ids[index % len(patient_ids)]
+        started = time.perf_counter()
+        if strategy == "auto":
+            _, doctor = create_auto_assigned_consultation(_consultation(patient_id, None, run_id), specialization)
+            doctor_id = doctor["_id"]
+        else:
+            doctor_id = doctors[0]["_id"]
+            create_consultation(_consultation(patient_id, doctor_id, run_id))
+        return doctor_id, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as sessions:
+        results = list(sessions.map(submit, range(submissions)))
+    elapsed = time.perf_counter() - started
+    assigned = Counter(doctor_id for doctor_id, _ in results)
+
+    # Queue length per doctor after the run (existing backlog + new requests)
+    loads = {doctor["_id"]: doctor.get("pending_count", 0) for doctor in db[USERS_COLLECTION].find(
+        {"_id": {"$in": [doctor["_id"] for doctor in doctors]}}, {"pending_count": 1}
+    )}
+    db[CONSULTATIONS_COLLECTION].delete_many({"benchmark_run": run_id})
+
+    latencies = sorted(latency for _, latency in results)
+    queue_lengths = list(loads.values())
+    return {
+        "strategy": strategy,
+        "doctors": len(doctors),
+        "submissions_per_second": submissions / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "doctors_used": len(assigned),
+        "max_queue": max(queue_lengths),
+        "min_queue": min(queue_lengths),
+        "queue_stdev": statistics.pstdev(queue_lengths),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark doctor assignment under concurrent submissions")
+    parser.add_argument("--submissions", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent simulated sessions")
+    parser.add_argument("--specialization", default=SPECIALIZATIONS[0], choices=SPECIALIZATIONS)
+    parser.add_argument("--strategy", nargs="+", default=["first", "auto"], choices=["first", "auto"])
+    args = parser.parse_args()
+
+    from database.connection import db
+    from utils.assignment import rebuild_doctor_loads
+    from utils.stats import rebuild_stats
+
+    print(f"{args.submissions} submissions from {args.clients} clients to {args.specialization} doctors")
+    print(f"{'strategy':<8} {'subm/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'doctors':>8} {'max q':>6} {'min q':>6} {'stdev':>7}")
+    for strategy in args.strategy:
+        # Start every strategy from the true backlog
+        rebuild_doctor_loads(db)
+        result = run_strategy(db, strategy, args.specialization, args.submissions, args.clients)
+        print(f"{result['strategy']:<8} {result['submissions_per_second']:>8.0f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['doctors_used']:>4}/{result['doctors']:<3} "
+              f"{result['max_queue']:>6} {result['min_queue']:>6} {result['queue_stdev']:>7.1f}")
+
+    rebuild_doctor_loads(db)
+    rebuild_stats(db)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/password_hashing.py
+"""
+Logins per second for each bcrypt cost factor, through the same bounded
+worker pool the app uses (PASSWORD_HASH_WORKERS).
+
+    python -m benchmarks.password_hashing --rounds 10 11 12 13 --logins 200 --clients 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import PASSWORD_HASH_WORKERS
+from utils.passwords import hash_password, verify_password
+
+def benchmark_rounds(rounds, logins, clients):
+    """Simulate `clients` concurrent sessions submitting `logins` verifications in total"""
+    hashed = hash_password("benchmark-password", rounds=rounds)
+    latencies = []
+
+    def login(_):
+        started = time.perf_counter()
+        verify_password("benchmark-password", hashed)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as sessions:
+        list(sessions.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rounds": rounds,
+        "logins_per_second": logins / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt login throughput")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--logins", type=int, default=100, help="verifications per cost factor")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent simulated sessions")
+    args = parser.parse_args()
+
+    print(f"hash workers: {PASSWORD_HASH_WORKERS}, clients: {args.clients}, logins: {args.logins}")
+    print(f"{'rounds':>6} {'logins/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for rounds in args.rounds:
+        result = benchmark_rounds(rounds, args.logins, args.clients)
+        print(f"{result['rounds']:>6} {result['logins_per_second']:>10.1f} "
+              f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
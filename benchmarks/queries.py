@@ -0,0 +1,192 @@
+# benchmarks/queries.py
+"""
+End-to-end latency of every dashboard query path against a seeded database.
+
+    DATABASE_NAME=mediconsult_bench python -m benchmarks.queries --iterations 200 --output bench.json
+
+Query cases run the shapes from database.indexes.dashboard_queries (filter,
+sort, projection and the limit of the real call path - unbounded reads such as
+the pending-queue full sync and the attach_users $in lookups run unbounded) for
+a random sample of real doctors / patients, and report p50/p95/p99 latency plus
+keys and documents examined from explain(). Function cases time whole call
+paths (queue sync, search, a history page with its user lookup). The JSON
+output carries the git commit so runs can be compared between commits.
+"""
+import argparse
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+from config import USERS_COLLECTION, CONSULTATIONS_COLLECTION, SPECIALIZATIONS
+from database.indexes import dashboard_queries
+from utils.pagination import DEFAULT_PAGE_SIZE
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def _summary(name, latencies, explain=None):
+    latencies = sorted(latencies)
+    result = {
+        "name": name,
+        "iterations": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    if explain:
+        result.update(explain)
+    return result
+
+def _cursor(db, collection_name, query, sort, projection, limit):
+    cursor = db[collection_name].find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor.limit(limit) if limit else cursor
+
+def _execution_stats(db, collection_name, query, sort, projection, limit):
+    stats = _cursor(db, collection_name, query, sort, projection, limit).explain().get("executionStats", {})
+    return {
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_returned": stats.get("nReturned"),
+    }
+
+def _sample_ids(db, user_type, size):
+    return [doc["_id"] for doc in db[USERS_COLLECTION].aggregate([
+        {"$match": {"user_type": user_type}},
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 1}}
+    ])]
+
+def _sample_emails(db, size):
+    return [doc["email"] for doc in db[USERS_COLLECTION].aggregate([
+        {"$sample": {"size": size}}, {"$project": {"_id": 0, "email": 1}}
+    ])]
+
+def _time(fn, iterations):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def _search_text(rng):
+    from benchmarks.seed import SYMPTOMS
+    return rng.choice(SYMPTOMS).split()[-1]
+
+def run_query_cases(db, iterations, page_size, rng):
+    doctor_ids = _sample_ids(db, "doctor", 50) or [None]
+    patient_ids = _sample_ids(db, "patient", 200) or [None]
+    emails = _sample_emails(db, 200) or ["admin@mediconsult.com"]
+
+    def shapes():
+        return dashboard_queries(
+            doctor_id=rng.choice(doctor_ids),
+            patient_id=rng.choice(patient_ids),
+            user_id=rng.choice(patient_ids),
+            email=rng.choice(emails),
+            specialization=rng.choice(SPECIALIZATIONS),
+            # attach_users resolves at most one page of distinct users
+            user_ids=rng.sample(patient_ids, min(page_size, len(patient_ids))),
+            search_text=_search_text(rng),
+            page_size=page_size
+        )
+
+    results = []
+    for index, (name, *shape) in enumerate(shapes()):
+        def run_once():
+            _, *shape_ = shapes()[index]
+            list(_cursor(db, *shape_))
+
+        latencies = _time(run_once, iterations)
+        results.append(_summary(name, latencies, _execution_stats(db, *shape)))
+    return results, doctor_ids, patient_ids
+
+def run_function_cases(db, iterations, doctor_ids, patient_ids, page_size, rng, bcrypt_iterations):
+    from utils import authenticate_user, get_doctors_by_specialization, _load_doctors, attach_users
+    from utils.pagination import find_page
+    from utils.projections import CONSULTATION_DOCTOR_HISTORY, CONSULTATION_OPTION, USER_NAME, USER_SUMMARY
+    from utils.queue_sync import PendingQueue
+    from utils.search import search_consultations
+    from utils.stats import compute_stats, get_dashboard_stats, get_doctor_summary
+    from benchmarks.seed import SEED_PASSWORD
+
+    consultations_collection = db[CONSULTATIONS_COLLECTION]
+    emails = _sample_emails(db, 50) or ["admin@mediconsult.com"]
+
+    def history_page(query, projection, id_field, as_field, user_projection=USER_SUMMARY):
+        docs, _ = find_page(consultations_collection, query, projection, page_size)
+        return attach_users(docs, id_field, as_field, user_projection)
+
+    cases = [
+        ("doctor: pending queue full sync (+ patients)",
+         lambda: PendingQueue(rng.choice(doctor_ids)).sync(full=True), iterations),
+        ("doctor: patient history page (+ patients)",
+         lambda: history_page({"doctor_id": rng.choice(doctor_ids)}, CONSULTATION_DOCTOR_HISTORY,
+                              "patient_id", "patient"), iterations),
+        ("doctor: history search (first page)",
+         lambda: search_consultations(_search_text(rng), doctor_id=rng.choice(doctor_ids), page_size=page_size),
+         iterations),
+        ("patient: re-consultation options (+ doctors)",
+         lambda: history_page({"patient_id": rng.choice(patient_ids)}, CONSULTATION_OPTION,
+                              "doctor_id", "doctor", USER_NAME), iterations),
+        ("admin: stats document", get_dashboard_stats, iterations),
+        ("admin: $facet stats aggregation", lambda: compute_stats(db), max(1, iterations // 10)),
+        ("doctor: my consultations summary", lambda: get_doctor_summary(rng.choice(doctor_ids)), iterations),
+        ("get_doctors_by_specialization (uncached)", lambda: _load_doctors(rng.choice(SPECIALIZATIONS)), iterations),
+        ("get_doctors_by_specialization (cached)", lambda: get_doctors_by_specialization(rng.choice(SPECIALIZATIONS)), iterations),
+        ("authenticate_user (incl. bcrypt)", lambda: authenticate_user(rng.choice(emails), SEED_PASSWORD), bcrypt_iterations),
+    ]
+    return [_summary(name, _time(fn, count)) for name, fn, count in cases if count]
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MediConsult dashboard queries")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--bcrypt-iterations", type=int, default=20, help="0 skips the bcrypt login case")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_results.json", help="machine-readable results")
+    args = parser.parse_args()
+
+    from database.connection import db
+    rng = random.Random(args.seed)
+
+    query_results, doctor_ids, patient_ids = run_query_cases(db, args.iterations, args.page_size, rng)
+    function_results = run_function_cases(db, args.iterations, doctor_ids, patient_ids, args.page_size, rng,
+                                          args.bcrypt_iterations)
+    results = query_results + function_results
+
+    print(f"{'case':<45} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'docs examined':>14}")
+    for result in results:
+        print(f"{result['name']:<45} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{str(result.get('docs_examined', '-')):>14}")
+
+    with open(args.output, "w") as out:
+        json.dump({
+            "commit": _git_commit(),
+            "run_at": datetime.utcnow().isoformat(),
+            "database": db.name,
+            "collections": {
+                USERS_COLLECTION: db[USERS_COLLECTION].estimated_document_count(),
+                CONSULTATIONS_COLLECTION: db[CONSULTATIONS_COLLECTION].estimated_document_count(),
+            },
+            "iterations": args.iterations,
+            "page_size": args.page_size,
+            "results": results,
+        }, out, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# benchmarks/seed.py
+"""
+Synthetic data generator following the User / Consultation models.
+
+    DATABASE_NAME=mediconsult_bench python -m benchmarks.seed --consultations 100000
+    DATABASE_NAME=mediconsult_bench python -m benchmarks.seed --consultations 10000000 --drop
+
+Users are created at a ratio of one patient per --consultations-per-patient
+consultations and one doctor per --patients-per-doctor patients. Every seeded
+user shares the password "password123" (hashed once) so logins can be
+benchmarked. Run the migrations afterwards (or pass --migrate) to build the
+indexes and stats document.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from config import (
+    USERS_COLLECTION, CONSULTATIONS_COLLECTION, SPECIALIZATIONS, BCRYPT_ROUNDS,
+    USER_TYPE_PATIENT, USER_TYPE_DOCTOR
+)
+from models import User, Consultation
+
+SEED_PASSWORD = "password123"
+STATUS_WEIGHTS = {"completed": 0.75, "in_progress": 0.1, "pending": 0.15}
+SYMPTOMS = [
+    "persistent headache", "chest pain", "shortness of breath", "skin rash", "joint pain",
+    "fever and chills", "dizziness", "lower back pain", "anxiety", "insomnia", "cough",
+    "abdominal pain", "fatigue", "blurred vision", "palpitations", "itching"
+]
+DIAGNOSES = [
+    "migraine", "viral infection", "contact dermatitis", "hypertension", "osteoarthritis",
+    "generalized anxiety disorder", "bronchitis", "gastritis", "iron deficiency anemia"
+]
+ALLERGIES = ["penicillin", "peanuts", "latex", "pollen", "dust", "shellfish"]
+
+def _batched_insert(collection, documents, batch_size):
+    batch = []
+    inserted = 0
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def _random_time(rng, start, end):
+    return start + timedelta(seconds=rng.uniform(0, (end - start).total_seconds()))
+
+def generate_doctors(rng, count, password_hash, start, end):
+    for index in range(count):
+        doctor = User(
+            name=f"Doctor {index}",
+            email=f"doctor{index}@bench.mediconsult.com",
+            password=password_hash,
+            user_type=USER_TYPE_DOCTOR,
+            phone=f"+1555{index:07d}",
+            specialization=SPECIALIZATIONS[index % len(SPECIALIZATIONS)]
+        ).to_dict()
+        doctor.update({
+            "_id": ObjectId(),
+            "qualifications": "MD",
+            "consultation_fee": rng.choice([50, 80, 100, 150]),
+            "available_hours": "Mon-Fri 9AM-5PM",
+            "is_available": True,
+            "created_at": _random_time(rng, start, end)
+        })
+        yield doctor
+
+def generate_patients(rng, count, password_hash, start, end):
+    for index in range(count):
+        patient = User(
+            name=f"Patient {index}",
+            email=f"patient{index}@bench.mediconsult.com",
+            password=password_hash,
+            user_type=USER_TYPE_PATIENT,
+            phone=f"+1666{index:07d}",
+            age=rng.randint(1, 95),
+            gender=rng.choice(["Male", "Female", "Other"]),
+            allergies=rng.sample(ALLERGIES, rng.randint(0, 2))
+        ).to_dict()
+        patient.update({"_id": ObjectId(), "created_at": _random_time(rng, start, end)})
+        yield patient
+
+def generate_consultations(rng, count, doctors, patient_ids, start, end):
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    for _ in range(count):
+        doctor = rng.choice(doctors)
+        status = rng.choices(statuses, weights)[0]
+        consultation = Consultation(
+            patient_id=rng.choice(patient_ids),
+            doctor_id=doctor["_id"],
+            symptoms=", ".join(rng.sample(SYMPTOMS, rng.randint(1, 3))),
+            allergies=rng.sample(ALLERGIES, rng.randint(0, 2)),
+            status=status,
+            diagnosis=rng.choice(DIAGNOSES) if status == "completed" else None,
+            prescription="rest and fluids" if status == "completed" else None
+        ).to_dict()
+        created_at = _random_time(rng, start, end)
+        updated_at = created_at + timedelta(hours=rng.expovariate(1 / 18)) if status != "pending" else created_at
+        consultation.update({
+            "doctor_name": doctor["name"],
+            "doctor_specialization": doctor["specialization"],
+            "consultation_fee": doctor["consultation_fee"],
+            "created_at": created_at,
+            "updated_at": min(updated_at, end)
+        })
+        yield consultation
+
+def seed(db, consultations, consultations_per_patient=5, patients_per_doctor=200,
+         days=365, batch_size=5000, random_seed=42):
+    from utils.passwords import hash_password
+
+    rng = random.Random(random_seed)
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    patients = max(1, consultations // consultations_per_patient)
+    doctors = max(len(SPECIALIZATIONS), patients // patients_per_doctor)
+    password_hash = hash_password(SEED_PASSWORD, rounds=BCRYPT_ROUNDS)
+
+    started = time.perf_counter()
+    doctor_docs = list(generate_doctors(rng, doctors, password_hash, start, end))
+    db[USERS_COLLECTION].insert_many(doctor_docs, ordered=False)
+    print(f"  {doctors} doctors")
+
+    patient_ids = []
+    def patient_stream():
+        for patient in generate_patients(rng, patients, password_hash, start, end):
+            patient_ids.append(patient["_id"])
+            yield patient
+    _batched_insert(db[USERS_COLLECTION], patient_stream(), batch_size)
+    print(f"  {patients} patients")
+
+    inserted = _batched_insert(
+        db[CONSULTATIONS_COLLECTION],
+        generate_consultations(rng, consultations, doctor_docs, patient_ids, start, end),
+        batch_size
+    )
+    elapsed = time.perf_counter() - started
+    print(f"  {inserted} consultations ({inserted / elapsed:.0f} docs/s)")
+
+    # Consultations were bulk-inserted, so derive the doctors' pending counters once
+    from utils.assignment import rebuild_doctor_loads
+    rebuild_doctor_loads(db)
+    return {"doctors": doctors, "patients": patients, "consultations": inserted}
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic MediConsult data")
+    parser.add_argument("--consultations", type=int, default=10000)
+    parser.add_argument("--consultations-per-patient", type=int, default=5)
+    parser.add_argument("--patients-per-doctor", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="drop users and consultations first")
+    parser.add_argument("--migrate", action="store_true", help="run migrations (indexes, stats) afterwards")
+    args = parser.parse_args()
+
+    from database.connection import db
+    from database.migrations import run_migrations
+
+    if args.drop:
+        db.drop_collection(USERS_COLLECTION)
+        db.drop_collection(CONSULTATIONS_COLLECTION)
+
+    print(f"Seeding {db.name}:")
+    seed(db, args.consultations, args.consultations_per_patient, args.patients_per_doctor,
+         args.days, args.batch_size, args.seed)
+
+    if args.migrate:
+        run_migrations(db, verbose=True)
+        # Stats may predate the seed when migrations had already run
+        from utils.stats import rebuild_stats
+        rebuild_stats(db)
+
+if __name__ == "__main__":
+    main()
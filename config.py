@@ -6,12 +6,23 @@ load_dotenv()
 
 # MongoDB Configuration
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
-DATABASE_NAME = "mediconsult"
+DATABASE_NAME = os.getenv("DATABASE_NAME", "mediconsult")
+
+# A migration claim older than this is assumed to belong to a killed process and is taken over
+MIGRATION_LOCK_TIMEOUT_SECONDS = int(os.getenv("MIGRATION_LOCK_TIMEOUT_SECONDS", "600"))
 
 # Collections
 USERS_COLLECTION = "users"
 CONSULTATIONS_COLLECTION = "consultations"
 LAB_REPORTS_COLLECTION = "lab_reports"
+STATS_COLLECTION = "stats"
+SESSIONS_COLLECTION = "sessions"
+SETTINGS_COLLECTION = "settings"
+LOGIN_ATTEMPTS_COLLECTION = "login_attempts"
+LAB_REPORT_PREVIEWS_COLLECTION = "lab_report_previews"
+EXPORT_STATE_COLLECTION = "export_state"
+DAILY_STATS_COLLECTION = "daily_stats"
+SLOW_QUERIES_COLLECTION = "slow_queries"
 
 # User Types
 USER_TYPE_PATIENT = "patient"
@@ -27,4 +38,90 @@ SPECIALIZATIONS = [
     "Pediatrician",
     "Psychiatrist",
     "General Physician"
-]
\ No newline at end of file
+]
+
+# MongoDB connection pool (options set in MONGODB_URI take precedence)
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+# Comma separated list, e.g. "zstd,snappy,zlib" (empty disables compression)
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "")
+
+# Serve admin statistics from the incrementally maintained stats document
+MATERIALIZED_STATS = os.getenv("MATERIALIZED_STATS", "true").lower() == "true"
+
+# Build wider indexes so paginated list views are answered from the index alone
+COVERED_LIST_INDEXES = os.getenv("COVERED_LIST_INDEXES", "false").lower() == "true"
+
+# In-process doctor directory cache (per specialization)
+DOCTOR_CACHE_TTL_SECONDS = int(os.getenv("DOCTOR_CACHE_TTL_SECONDS", "300"))
+DOCTOR_CACHE_MAX_ENTRIES = int(os.getenv("DOCTOR_CACHE_MAX_ENTRIES", "32"))
+
+# Password hashing (bcrypt cost factor and size of the hashing worker pool)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Signed session-resumption tokens (SESSION_SECRET should be set in production;
+# otherwise a random secret is generated once and stored in the settings collection)
+SESSION_SECRET = os.getenv("SESSION_SECRET", "")
+SESSION_TTL_HOURS = int(os.getenv("SESSION_TTL_HOURS", "12"))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "60"))
+
+# Login throttling (token buckets per email and per client, checked before bcrypt)
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "5"))
+LOGIN_CLIENT_BURST = int(os.getenv("LOGIN_CLIENT_BURST", "20"))
+LOGIN_CLIENT_PER_MINUTE = float(os.getenv("LOGIN_CLIENT_PER_MINUTE", "30"))
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+# "memory" (per process) or "mongo" (shared across replicas)
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 (the shipped
+# docker-compose) ignores the header, since clients can set it to anything
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+
+# Largest export the admin dashboard builds (it is staged in a temp file and sent
+# through the browser); bigger exports go through python -m database.export_consultations
+EXPORT_UI_MAX_ROWS = int(os.getenv("EXPORT_UI_MAX_ROWS", "100000"))
+
+# Lab report storage: "gridfs" (default) or "local" (content-addressed files under LAB_REPORT_DIR)
+LAB_REPORT_STORE = os.getenv("LAB_REPORT_STORE", "gridfs")
+LAB_REPORT_BUCKET = os.getenv("LAB_REPORT_BUCKET", "lab_report_files")
+LAB_REPORT_DIR = os.getenv("LAB_REPORT_DIR", "data/lab_reports")
+LAB_REPORT_CHUNK_SIZE = int(os.getenv("LAB_REPORT_CHUNK_SIZE", str(1024 * 1024)))
+
+# Lab report previews (generated in the background at upload time)
+PREVIEW_MAX_SIZE = int(os.getenv("PREVIEW_MAX_SIZE", "800"))
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "2"))
+PREVIEW_CACHE_ENTRIES = int(os.getenv("PREVIEW_CACHE_ENTRIES", "256"))
+
+# Consultation search: "text" (MongoDB text index), "memory" (in-process inverted
+# index) or "auto" (text index, falling back to memory when it is unavailable)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+SEARCH_INDEX_TTL_SECONDS = int(os.getenv("SEARCH_INDEX_TTL_SECONDS", "60"))
+
+# MongoDB command monitoring (per-view latency / round trips, slow query log)
+QUERY_MONITORING = os.getenv("QUERY_MONITORING", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_LOG_SIZE = int(os.getenv("QUERY_LOG_SIZE", "5000"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(16 * 1024 * 1024)))
+
+# Doctor pending-queue delta sync: auto-refresh interval, look-back overlap for
+# writes whose client-side updated_at lags the watermark, periodic full reload
+QUEUE_REFRESH_SECONDS = int(os.getenv("QUEUE_REFRESH_SECONDS", "30"))
+QUEUE_SYNC_OVERLAP_SECONDS = int(os.getenv("QUEUE_SYNC_OVERLAP_SECONDS", "5"))
+QUEUE_FULL_SYNC_SECONDS = int(os.getenv("QUEUE_FULL_SYNC_SECONDS", "900"))
+
+# Live consultation updates pushed to open sessions: "auto" (change stream on a
+# replica set, polling otherwise - "changestream" is an alias), "poll" or "off"
+LIVE_UPDATES = os.getenv("LIVE_UPDATES", "auto").lower()
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "2"))
+LIVE_CHECK_SECONDS = float(os.getenv("LIVE_CHECK_SECONDS", "3"))
+LIVE_MAILBOX_SIZE = int(os.getenv("LIVE_MAILBOX_SIZE", "200"))
+
+# Render profiling: show the per-section debug overlay in the sidebar
+PROFILE_OVERLAY = os.getenv("PROFILE_OVERLAY", "false").lower() == "true"
+PROFILE_TRACE_SIZE = int(os.getenv("PROFILE_TRACE_SIZE", "2000"))
@@ -0,0 +1,43 @@
+# database/connection.py
+import streamlit as st
+from pymongo import MongoClient, uri_parser
+from config import (
+    MONGODB_URI, DATABASE_NAME,
+    MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, MONGODB_MAX_IDLE_TIME_MS,
+    MONGODB_CONNECT_TIMEOUT_MS, MONGODB_SOCKET_TIMEOUT_MS,
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS, MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    MONGODB_COMPRESSORS, QUERY_MONITORING
+)
+from database.monitoring import command_monitor
+
+def _client_options(uri):
+    """Pool/timeout defaults from config, skipping anything already set in the URI"""
+    defaults = {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGODB_SOCKET_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "retryWrites": True,
+        "retryReads": True,
+    }
+    if MONGODB_COMPRESSORS:
+        defaults["compressors"] = MONGODB_COMPRESSORS
+
+    uri_options = uri_parser.parse_uri(uri)["options"]
+    return {key: value for key, value in defaults.items() if key not in uri_options}
+
+@st.cache_resource
+def get_client():
+    """Process-wide MongoClient shared by every session and script rerun"""
+    event_listeners = [command_monitor] if QUERY_MONITORING else []
+    client = MongoClient(MONGODB_URI, event_listeners=event_listeners, **_client_options(MONGODB_URI))
+    command_monitor.attach_slow_log(client[DATABASE_NAME])
+    return client
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+db = get_database()
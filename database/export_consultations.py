@@ -0,0 +1,155 @@
+# database/export_consultations.py
+"""
+Streaming consultation export for analytics.
+
+    python -m database.export_consultations consultations.parquet
+    python -m database.export_consultations changes.csv --incremental
+
+Consultations are read from a projected cursor in fixed-size batches and each
+batch is appended to the output, so memory stays bounded by --batch-size.
+--incremental only exports documents updated since the watermark left by the
+previous incremental run. The watermark is that run's start minus
+WATERMARK_SAFETY_MARGIN, so a write stamped just before a run but committed
+just after it is still picked up next time; consecutive incremental files can
+therefore overlap, and consumers dedupe on consultation_id (latest updated_at
+wins).
+"""
+import argparse
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config import CONSULTATIONS_COLLECTION, EXPORT_STATE_COLLECTION
+from database.rollups import WATERMARK_SAFETY_MARGIN
+from utils.projections import CONSULTATION_EXPORT
+
+EXPORT_STATE_ID = "consultations"
+DEFAULT_BATCH_SIZE = 5000
+
+EXPORT_SCHEMA = pa.schema([
+    ("consultation_id", pa.string()),
+    ("patient_id", pa.string()),
+    ("doctor_id", pa.string()),
+    ("doctor_name", pa.string()),
+    ("doctor_specialization", pa.string()),
+    ("status", pa.string()),
+    ("symptoms", pa.string()),
+    ("diagnosis", pa.string()),
+    ("prescription", pa.string()),
+    ("consultation_fee", pa.float64()),
+    ("created_at", pa.timestamp("ms")),
+    ("updated_at", pa.timestamp("ms")),
+])
+
+def _row(consult):
+    fee = consult.get("consultation_fee")
+    return {
+        "consultation_id": str(consult["_id"]),
+        "patient_id": str(consult.get("patient_id") or ""),
+        "doctor_id": str(consult.get("doctor_id") or ""),
+        "doctor_name": consult.get("doctor_name"),
+        "doctor_specialization": consult.get("doctor_specialization"),
+        "status": consult.get("status"),
+        "symptoms": consult.get("symptoms"),
+        "diagnosis": consult.get("diagnosis"),
+        "prescription": consult.get("prescription"),
+        "consultation_fee": float(fee) if isinstance(fee, (int, float)) else None,
+        "created_at": consult.get("created_at"),
+        "updated_at": consult.get("updated_at"),
+    }
+
+def changed_since_filter(watermark):
+    # Inclusive, so documents stamped exactly at the watermark are never lost
+    if not watermark:
+        return {}
+    return {"updated_at": {"$gte": watermark}}
+
+def iter_batches(db, watermark=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield (DataFrame, last (updated_at, _id)) per batch, oldest change first"""
+    cursor = db[CONSULTATIONS_COLLECTION].find(
+        changed_since_filter(watermark), CONSULTATION_EXPORT
+    ).sort([("updated_at", 1), ("_id", 1)]).batch_size(batch_size)
+
+    rows = []
+    last = None
+    for consult in cursor:
+        rows.append(_row(consult))
+        last = (consult.get("updated_at"), consult["_id"])
+        if len(rows) >= batch_size:
+            yield pd.DataFrame(rows, columns=EXPORT_SCHEMA.names), last
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows, columns=EXPORT_SCHEMA.names), last
+
+def export_consultations(db, output, file_format="parquet", watermark=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write consultations to output (path or binary file object).
+    Returns (rows written, last (updated_at, _id) exported or None).
+    """
+    written = 0
+    last = None
+    writer = None
+    try:
+        for frame, last in iter_batches(db, watermark, batch_size):
+            if file_format == "parquet":
+                if writer is None:
+                    writer = pq.ParquetWriter(output, EXPORT_SCHEMA, compression="zstd")
+                writer.write_table(pa.Table.from_pandas(frame, schema=EXPORT_SCHEMA, preserve_index=False))
+            else:
+                csv_bytes = frame.to_csv(index=False, header=written == 0).encode("utf-8")
+                if hasattr(output, "write"):
+                    output.write(csv_bytes)
+                else:
+                    with open(output, "wb" if written == 0 else "ab") as out:
+                        out.write(csv_bytes)
+            written += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if written == 0 and file_format == "parquet":
+        # Still produce a valid (empty) file
+        pq.write_table(EXPORT_SCHEMA.empty_table(), output)
+    return written, last
+
+def load_watermark(db):
+    state = db[EXPORT_STATE_COLLECTION].find_one({"_id": EXPORT_STATE_ID})
+    if not state:
+        return None
+    if "watermark" not in state:
+        # Written before the safety margin existed: last document exported
+        return state["last_updated_at"] - WATERMARK_SAFETY_MARGIN
+    return state["watermark"]
+
+def save_watermark(db, started_at):
+    """Record an incremental run that started at started_at (read before the export query)"""
+    db[EXPORT_STATE_COLLECTION].update_one(
+        {"_id": EXPORT_STATE_ID},
+        {"$set": {"watermark": started_at - WATERMARK_SAFETY_MARGIN, "exported_at": datetime.utcnow()},
+         "$unset": {"last_updated_at": "", "last_id": ""}},
+        upsert=True
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Export consultations to Parquet or CSV")
+    parser.add_argument("output", help="output path (.parquet or .csv)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default=None,
+                        help="default: from the output extension")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only export changes since the last incremental run")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if os.path.splitext(args.output)[1].lower() == ".csv" else "parquet")
+
+    from database.connection import db
+    watermark = load_watermark(db) if args.incremental else None
+    started_at = datetime.utcnow()
+    written, _ = export_consultations(db, args.output, file_format, watermark, args.batch_size)
+    if args.incremental:
+        save_watermark(db, started_at)
+    print(f"{written} consultation(s) exported to {args.output}")
+
+if __name__ == "__main__":
+    main()
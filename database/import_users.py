@@ -0,0 +1,210 @@
+# database/import_users.py
+"""
+Bulk user import.
+
+    python -m database.import_users users.csv --rejects rejects.csv
+    python -m database.import_users users.jsonl --batch-size 2000 --workers 8
+
+Input is CSV (header row) or JSON Lines; a .json file holding one array is
+also accepted but is read whole. Required columns: name, email, password,
+user_type (patient/doctor). Optional: phone, age, gender, specialization,
+qualifications, consultation_fee, available_hours.
+
+Passwords are hashed on a process pool while the previous batch is written
+with unordered insert_many; duplicate emails are rejected by the unique email
+index and listed in the reject report with every invalid row.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import bcrypt
+from pymongo.errors import BulkWriteError
+from config import USERS_COLLECTION, SPECIALIZATIONS, BCRYPT_ROUNDS, USER_TYPE_PATIENT, USER_TYPE_DOCTOR
+from models import User
+
+DUPLICATE_KEY_ERROR = 11000
+DOCTOR_FIELDS = ["qualifications", "consultation_fee", "available_hours"]
+
+def _hash_many(passwords, rounds):
+    # Runs in a worker process
+    return [bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+            for password in passwords]
+
+def read_rows(path):
+    """
+    Yield (line_number, row) without loading CSV / JSON Lines files into memory.
+    A JSON Lines row that does not parse is yielded as its JSONDecodeError, so
+    the caller can reject that line and carry on.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as source:
+        if extension == ".csv":
+            for line_number, row in enumerate(csv.DictReader(source), start=2):
+                yield line_number, row
+        elif extension == ".json":
+            for line_number, row in enumerate(json.load(source), start=1):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as invalid:
+                    yield line_number, invalid
+
+def build_user(row):
+    """Validate one input row; returns (user document without password, error)"""
+    name = (row.get("name") or "").strip()
+    email = (row.get("email") or "").strip()
+    user_type = (row.get("user_type") or "").strip().lower()
+    specialization = (row.get("specialization") or "").strip() or None
+
+    if not name or not email or not row.get("password"):
+        return None, "missing name, email or password"
+    if user_type not in (USER_TYPE_PATIENT, USER_TYPE_DOCTOR):
+        return None, f"invalid user_type {user_type!r}"
+    if user_type == USER_TYPE_DOCTOR and specialization not in SPECIALIZATIONS:
+        return None, f"invalid specialization {specialization!r}"
+
+    age = row.get("age")
+    user = User(
+        name=name,
+        email=email,
+        password=None,
+        user_type=user_type,
+        phone=row.get("phone") or None,
+        specialization=specialization,
+        age=int(age) if age not in (None, "") else None,
+        gender=row.get("gender") or None
+    ).to_dict()
+    if user_type == USER_TYPE_DOCTOR:
+        for field in DOCTOR_FIELDS:
+            if row.get(field) not in (None, ""):
+                user[field] = row[field]
+        if "consultation_fee" in user:
+            user["consultation_fee"] = float(user["consultation_fee"])
+        user["is_available"] = True
+        user["pending_count"] = 0
+    return user, None
+
+class ImportReport:
+    def __init__(self, rejects_path=None):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self._rejects_file = open(rejects_path, "w", newline="", encoding="utf-8") if rejects_path else None
+        self._rejects = csv.writer(self._rejects_file) if self._rejects_file else None
+        if self._rejects:
+            self._rejects.writerow(["line", "email", "reason"])
+
+    def reject(self, line_number, email, reason):
+        self.rejected += 1
+        if self._rejects:
+            self._rejects.writerow([line_number, email, reason])
+
+    def progress(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"  read {self.read}, inserted {self.inserted}, rejected {self.rejected} "
+              f"({self.read / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def close(self):
+        if self._rejects_file:
+            self._rejects_file.close()
+
+def _insert_batch(users_collection, batch, report):
+    """batch: [(line_number, user)]; relies on the unique email index for dedupe"""
+    if not batch:
+        return
+    try:
+        result = users_collection.insert_many([user for _, user in batch], ordered=False)
+        report.inserted += len(result.inserted_ids)
+    except BulkWriteError as error:
+        details = error.details
+        report.inserted += details.get("nInserted", 0)
+        for write_error in details.get("writeErrors", []):
+            line_number, user = batch[write_error["index"]]
+            reason = "duplicate email" if write_error["code"] == DUPLICATE_KEY_ERROR else write_error["errmsg"]
+            report.reject(line_number, user["email"], reason)
+
+def _split(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _batches(rows, batch_size, report):
+    batch = []
+    for line_number, row in rows:
+        report.read += 1
+        if isinstance(row, json.JSONDecodeError):
+            report.reject(line_number, "", f"invalid JSON: {row.msg}")
+            continue
+        if not isinstance(row, dict):
+            report.reject(line_number, "", "row is not a JSON object")
+            continue
+        try:
+            user, error = build_user(row)
+        except (TypeError, ValueError) as invalid:
+            user, error = None, str(invalid)
+        if error:
+            report.reject(line_number, row.get("email", ""), error)
+            continue
+        batch.append((line_number, user, row["password"]))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def import_users(db, path, batch_size=1000, workers=None, rounds=BCRYPT_ROUNDS, rejects_path=None):
+    users_collection = db[USERS_COLLECTION]
+    users_collection.create_index("email", unique=True)
+    report = ImportReport(rejects_path)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = None
+        for batch in _batches(read_rows(path), batch_size, report):
+            # Hash this batch in the pool while the previous one is written
+            passwords = [password for _, _, password in batch]
+            futures = [pool.submit(_hash_many, chunk, rounds) for chunk in _split(passwords, workers)]
+            if pending:
+                _insert_batch(users_collection, _with_hashes(*pending), report)
+                report.progress()
+            pending = (batch, futures)
+        if pending:
+            _insert_batch(users_collection, _with_hashes(*pending), report)
+
+    report.progress()
+    report.close()
+    return report
+
+def _with_hashes(batch, futures):
+    hashes = [hashed for future in futures for hashed in future.result()]
+    now = datetime.utcnow()
+    return [(line_number, {**user, "password": hashed, "created_at": now})
+            for (line_number, user, _), hashed in zip(batch, hashes)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import MediConsult users")
+    parser.add_argument("path", help="CSV, JSON Lines or JSON array file")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS, help="bcrypt cost factor")
+    parser.add_argument("--rejects", default="import_rejects.csv", help="reject report path")
+    args = parser.parse_args()
+
+    from database.connection import db
+    from utils.stats import rebuild_stats
+
+    report = import_users(db, args.path, args.batch_size, args.workers, args.rounds, args.rejects)
+    # Counters were bypassed by insert_many; recompute them once
+    rebuild_stats(db)
+    print(f"Done: {report.inserted} inserted, {report.rejected} rejected (see {args.rejects})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# database/indexes.py
+"""
+Managed index set and query-plan checker.
+
+    python -m database.indexes            # create / update managed indexes
+    python -m database.indexes --check    # explain() dashboard queries, fail on COLLSCAN
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT
+from config import (
+    USERS_COLLECTION, CONSULTATIONS_COLLECTION, SESSIONS_COLLECTION, LOGIN_ATTEMPTS_COLLECTION,
+    LAB_REPORTS_COLLECTION, LAB_REPORT_BUCKET, DAILY_STATS_COLLECTION, COVERED_LIST_INDEXES
+)
+from utils.pagination import NEWEST_FIRST, DEFAULT_PAGE_SIZE
+from utils.projections import (
+    USER_AUTH, USER_NAME, USER_SUMMARY, USER_LIST_ROW, DOCTOR_OPTION, DOCTOR_CARD,
+    CONSULTATION_DOCTOR_HISTORY, CONSULTATION_PATIENT_HISTORY, CONSULTATION_OPTION, CONSULTATION_ROW,
+    CONSULTATION_QUEUE_SYNC, CONSULTATION_SEARCH_RESULT
+)
+
+# collection -> [(keys, options)]
+INDEXES = {
+    USERS_COLLECTION: [
+        ([("email", ASCENDING)], {"unique": True}),
+        ([("user_type", ASCENDING)], {}),
+        ([("specialization", ASCENDING)], {}),
+        # Doctors by specialization; auto-assignment picks the least-loaded available one
+        ([("user_type", ASCENDING), ("specialization", ASCENDING), ("is_available", ASCENDING),
+          ("pending_count", ASCENDING), ("_id", ASCENDING)], {}),
+        # Keyset-paginated user listings (admin, doctor / patient directories)
+        ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("user_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    CONSULTATIONS_COLLECTION: [
+        # Doctor "New Consultations": pending queue full sync
+        ([("doctor_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # Doctor pending-queue delta sync (changes since the session's watermark)
+        ([("doctor_id", ASCENDING), ("updated_at", ASCENDING)], {}),
+        # Doctor "Patient History" / "My Consultations"
+        ([("doctor_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # Patient "Re-consultation" / "Consultation History"
+        ([("patient_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # Daily rollups recompute whole created_at days
+        ([("created_at", ASCENDING)], {}),
+        # Incremental exports / change polling ordered by (updated_at, _id)
+        ([("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+        # Consultation search (utils/search.py keeps SEARCH_WEIGHTS in sync)
+        ([("symptoms", TEXT), ("diagnosis", TEXT), ("prescription", TEXT), ("consultation_notes", TEXT)],
+         {"name": "consultation_text",
+          "weights": {"diagnosis": 4, "symptoms": 3, "prescription": 2, "consultation_notes": 1}}),
+    ],
+    SESSIONS_COLLECTION: [
+        # Expired resumption tokens are removed by the TTL monitor
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+        ([("user_id", ASCENDING)], {}),
+    ],
+    LOGIN_ATTEMPTS_COLLECTION: [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    LAB_REPORTS_COLLECTION: [
+        ([("consultation_id", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("patient_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    DAILY_STATS_COLLECTION: [
+        ([("kind", ASCENDING), ("day", ASCENDING)], {}),
+    ],
+    # Content-hash deduplication of GridFS lab report blobs
+    f"{LAB_REPORT_BUCKET}.files": [
+        ([("metadata.sha256", ASCENDING)],
+         {"unique": True, "partialFilterExpression": {"metadata.sha256": {"$exists": True}}}),
+    ],
+}
+
+# Optional covering indexes for list views (COVERED_LIST_INDEXES=true); they hold
+# every field of USER_LIST_ROW / CONSULTATION_ROW so no document fetch is needed
+COVERED_INDEXES = {
+    USERS_COLLECTION: [
+        ([("created_at", DESCENDING), ("_id", DESCENDING), ("user_type", ASCENDING),
+          ("name", ASCENDING), ("email", ASCENDING)], {}),
+    ],
+    CONSULTATIONS_COLLECTION: [
+        ([("doctor_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING),
+          ("status", ASCENDING), ("patient_id", ASCENDING)], {}),
+    ],
+}
+
+# Indexes superseded by the ones above (prefixes of the keyset indexes)
+RETIRED_INDEXES = {
+    USERS_COLLECTION: [
+        # Prefix of the auto-assignment index
+        "user_type_1_specialization_1",
+    ],
+    CONSULTATIONS_COLLECTION: [
+        "doctor_id_1_status_1_created_at_-1",
+        "doctor_id_1_created_at_-1",
+        "patient_id_1_created_at_-1",
+    ],
+}
+
+def ensure_indexes(db):
+    """Create every managed index (no-op for indexes that already exist)"""
+    created = []
+    index_sets = [INDEXES, COVERED_INDEXES] if COVERED_LIST_INDEXES else [INDEXES]
+    for index_set in index_sets:
+        for collection_name, indexes in index_set.items():
+            collection = db[collection_name]
+            for keys, options in indexes:
+                created.append((collection_name, collection.create_index(keys, **options)))
+
+    for collection_name, index_names in RETIRED_INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                collection.drop_index(index_name)
+    return created
+
+# =============================================
+# QUERY PLAN CHECK
+# =============================================
+
+def dashboard_queries(doctor_id=None, patient_id=None, user_id=None, email="admin@mediconsult.com",
+                      specialization="Cardiologist", user_ids=None, search_text="pain", page_size=DEFAULT_PAGE_SIZE):
+    """
+    (name, collection, filter, sort, projection, limit) for the queries behind the dashboards.
+
+    limit is what the call path asks for: page_size + 1 for keyset pages, 1 for
+    find_one / find_one_and_update, None where every match is read.
+    """
+    doctor_id = doctor_id or ObjectId()
+    patient_id = patient_id or ObjectId()
+    user_id = user_id or ObjectId()
+    user_ids = user_ids or [user_id]
+    page = page_size + 1
+    return [
+        # utils/queue_sync.PendingQueue.sync
+        ("doctor: pending queue full sync", CONSULTATIONS_COLLECTION,
+         {"doctor_id": doctor_id, "status": "pending"}, None, CONSULTATION_QUEUE_SYNC, None),
+        ("doctor: queue delta sync", CONSULTATIONS_COLLECTION,
+         {"doctor_id": doctor_id, "updated_at": {"$gte": datetime.utcnow() - timedelta(minutes=5)}},
+         None, CONSULTATION_QUEUE_SYNC, None),
+        ("doctor: patient history", CONSULTATIONS_COLLECTION,
+         {"doctor_id": doctor_id}, NEWEST_FIRST, CONSULTATION_DOCTOR_HISTORY, page),
+        # utils/search._text_search, first page
+        ("doctor: history search", CONSULTATIONS_COLLECTION,
+         {"$text": {"$search": search_text}, "doctor_id": doctor_id},
+         [("score", {"$meta": "textScore"}), ("created_at", DESCENDING)],
+         {**CONSULTATION_SEARCH_RESULT, "score": {"$meta": "textScore"}}, page),
+        ("doctor: my consultations", CONSULTATIONS_COLLECTION,
+         {"doctor_id": doctor_id}, NEWEST_FIRST, CONSULTATION_ROW, page),
+        ("patient: re-consultation", CONSULTATIONS_COLLECTION,
+         {"patient_id": patient_id}, NEWEST_FIRST, CONSULTATION_OPTION, page),
+        ("patient: consultation history", CONSULTATIONS_COLLECTION,
+         {"patient_id": patient_id}, NEWEST_FIRST, CONSULTATION_PATIENT_HISTORY, page),
+        # utils.attach_users for one page of consultations
+        ("attach_users: patients by id", USERS_COLLECTION,
+         {"_id": {"$in": user_ids}}, None, USER_SUMMARY, None),
+        ("attach_users: doctor names by id", USERS_COLLECTION,
+         {"_id": {"$in": user_ids}}, None, USER_NAME, None),
+        ("patient: doctors by specialization", USERS_COLLECTION,
+         {"user_type": "doctor", "specialization": specialization}, None, DOCTOR_CARD, None),
+        ("patient: auto-assign doctor", USERS_COLLECTION,
+         {"user_type": "doctor", "specialization": specialization, "is_available": True},
+         [("pending_count", ASCENDING), ("_id", ASCENDING)], DOCTOR_OPTION, 1),
+        ("login: user by email", USERS_COLLECTION, {"email": email}, None, USER_AUTH, 1),
+        ("user by id", USERS_COLLECTION, {"_id": user_id}, None, USER_SUMMARY, 1),
+        ("admin: user management", USERS_COLLECTION, {}, NEWEST_FIRST, USER_LIST_ROW, page),
+        ("patient: find doctors", USERS_COLLECTION, {"user_type": "doctor"}, NEWEST_FIRST, DOCTOR_CARD, page),
+    ]
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    if "queryPlan" in plan:
+        stages += _plan_stages(plan["queryPlan"])
+    return [stage for stage in stages if stage]
+
+def explain_query(db, collection_name, query, sort=None, projection=None, limit=None):
+    cursor = db[collection_name].find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    return _plan_stages(winning_plan)
+
+def check_query_plans(db, queries=None):
+    """Return [(name, stages, ok)]; ok is False for any plan containing a COLLSCAN"""
+    results = []
+    for name, collection_name, query, sort, projection, limit in queries or dashboard_queries():
+        stages = explain_query(db, collection_name, query, sort, projection, limit)
+        results.append((name, stages, "COLLSCAN" not in stages))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage MediConsult indexes")
+    parser.add_argument("--check", action="store_true", help="fail if a dashboard query uses a COLLSCAN")
+    args = parser.parse_args()
+
+    from database.connection import db
+
+    if not args.check:
+        for collection_name, index_name in ensure_indexes(db):
+            print(f"  {collection_name}.{index_name}")
+        return
+
+    failed = False
+    for name, stages, ok in check_query_plans(db):
+        note = " (in-memory sort)" if "SORT" in stages else ""
+        if "IXSCAN" in stages and "FETCH" not in stages and "IDHACK" not in stages:
+            note += " (covered)"
+        print(f"  {'OK  ' if ok else 'FAIL'} {name}: {' -> '.join(stages)}{note}")
+        failed = failed or not ok
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
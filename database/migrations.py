@@ -0,0 +1,250 @@
+# database/migrations.py
+"""
+Versioned database bootstrap.
+
+Each migration runs once per deployment; applied versions are recorded in the
+schema_migrations collection. Once every migration is applied, the managed index
+set (database/indexes.py) is synced - that step is idempotent and runs on every
+deploy, so index changes need no migration. Run from the command line with:
+
+    python -m database.migrations            # apply pending migrations
+    python -m database.migrations --status   # list applied / pending
+"""
+import argparse
+import streamlit as st
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from config import USERS_COLLECTION, MIGRATION_LOCK_TIMEOUT_SECONDS
+
+SCHEMA_MIGRATIONS_COLLECTION = "schema_migrations"
+
+ADMIN_USER = {
+    "name": "System Administrator",
+    "email": "admin@mediconsult.com",
+    "user_type": "admin",
+    "phone": "+1234567890",
+}
+ADMIN_PASSWORD = "admin123"
+
+SAMPLE_DOCTORS = [
+    {
+        "name": "Sarah Wilson",
+        "email": "cardio@mediconsult.com",
+        "user_type": "doctor",
+        "specialization": "Cardiologist",
+        "qualifications": "MD Cardiology, 10 years experience",
+        "consultation_fee": 100,
+        "available_hours": "Mon-Fri 9AM-5PM",
+        "phone": "+1234567891",
+        "is_available": True,
+    },
+    {
+        "name": "Michael Chen",
+        "email": "derma@mediconsult.com",
+        "user_type": "doctor",
+        "specialization": "Dermatologist",
+        "qualifications": "MD Dermatology, Skin specialist",
+        "consultation_fee": 80,
+        "available_hours": "Mon-Wed-Fri 10AM-6PM",
+        "phone": "+1234567892",
+        "is_available": True,
+    }
+]
+SAMPLE_DOCTOR_PASSWORD = "doctor123"
+
+# =============================================
+# MIGRATIONS
+# =============================================
+
+def _seed_user(users_collection, user, password):
+    # Only pay for bcrypt when the user actually has to be created
+    if users_collection.find_one({"email": user["email"]}, {"_id": 1}):
+        return
+    from utils import hash_password
+    users_collection.insert_one({
+        **user,
+        "password": hash_password(password),
+        "created_at": datetime.utcnow()
+    })
+
+def seed_admin(db):
+    _seed_user(db[USERS_COLLECTION], ADMIN_USER, ADMIN_PASSWORD)
+
+def seed_sample_doctors(db):
+    for doctor in SAMPLE_DOCTORS:
+        _seed_user(db[USERS_COLLECTION], doctor, SAMPLE_DOCTOR_PASSWORD)
+
+def create_user_indexes(db):
+    users_collection = db[USERS_COLLECTION]
+    users_collection.create_index("email", unique=True)
+    users_collection.create_index("user_type")
+    users_collection.create_index("specialization")
+
+def superseded_by_index_sync(db):
+    # Former "Create managed indexes" steps; sync_indexes now runs on every deploy
+    pass
+
+def backfill_user_created_at(db):
+    # Keyset pagination orders users by created_at; derive it from the ObjectId where missing
+    users_collection = db[USERS_COLLECTION]
+    for user in users_collection.find({"created_at": {"$exists": False}}, {"_id": 1}):
+        users_collection.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"created_at": user["_id"].generation_time.replace(tzinfo=None)}}
+        )
+
+def build_stats_document(db):
+    from utils.stats import rebuild_stats
+    rebuild_stats(db)
+
+def backfill_doctor_availability(db):
+    # Auto-assignment only considers doctors flagged available; registration never set it
+    db[USERS_COLLECTION].update_many(
+        {"user_type": "doctor", "is_available": {"$exists": False}}, {"$set": {"is_available": True}}
+    )
+
+def build_doctor_loads(db):
+    from utils.assignment import rebuild_doctor_loads
+    rebuild_doctor_loads(db)
+
+def create_slow_query_log(db):
+    from database.monitoring import ensure_slow_query_log
+    ensure_slow_query_log(db)
+
+# (version, description, function) - append only, never renumber. Index changes
+# belong in database/indexes.py, not here
+MIGRATIONS = [
+    (1, "Seed system administrator", seed_admin),
+    (2, "Seed sample doctors", seed_sample_doctors),
+    (3, "Create users indexes", create_user_indexes),
+    (4, "Create managed indexes (consultations compound indexes)", superseded_by_index_sync),
+    (5, "Backfill users.created_at", backfill_user_created_at),
+    (6, "Create managed indexes (keyset pagination)", superseded_by_index_sync),
+    (7, "Build materialized stats document", build_stats_document),
+    (8, "Create managed indexes (covered list views, if enabled)", superseded_by_index_sync),
+    (9, "Create managed indexes (sessions)", superseded_by_index_sync),
+    (10, "Create managed indexes (login attempts)", superseded_by_index_sync),
+    (11, "Create managed indexes (lab reports)", superseded_by_index_sync),
+    (12, "Create managed indexes (consultation text search)", superseded_by_index_sync),
+    (13, "Create managed indexes (incremental export)", superseded_by_index_sync),
+    (14, "Create managed indexes (daily rollups)", superseded_by_index_sync),
+    (15, "Create capped slow_queries collection", create_slow_query_log),
+    (16, "Create managed indexes (pending queue delta sync)", superseded_by_index_sync),
+    (17, "Backfill doctors.is_available", backfill_doctor_availability),
+    (18, "Build doctors' pending counters", build_doctor_loads),
+    (19, "Create managed indexes (auto-assignment)", superseded_by_index_sync),
+]
+
+# =============================================
+# RUNNER
+# =============================================
+
+def applied_versions(db):
+    migrations_collection = db[SCHEMA_MIGRATIONS_COLLECTION]
+    return {doc["_id"] for doc in migrations_collection.find({"state": "applied"}, {"_id": 1})}
+
+def pending_migrations(db):
+    applied = applied_versions(db)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+def _claim(migrations_collection, version, description):
+    """Returns "claimed" when this process now owns version, "applied" or "busy" otherwise"""
+    now = datetime.utcnow()
+    try:
+        migrations_collection.insert_one({
+            "_id": version,
+            "description": description,
+            "state": "running",
+            "started_at": now
+        })
+        return "claimed"
+    except DuplicateKeyError:
+        pass
+
+    # A claim left behind by a killed process is taken over once it is stale
+    reclaimed = migrations_collection.update_one(
+        {"_id": version, "state": "running",
+         "started_at": {"$lt": now - timedelta(seconds=MIGRATION_LOCK_TIMEOUT_SECONDS)}},
+        {"$set": {"started_at": now}, "$inc": {"reclaims": 1}}
+    )
+    if reclaimed.modified_count:
+        return "claimed"
+    claim = migrations_collection.find_one({"_id": version}, {"state": 1})
+    return "applied" if claim and claim["state"] == "applied" else "busy"
+
+def sync_indexes(db):
+    from database.indexes import ensure_indexes
+    return ensure_indexes(db)
+
+def run_migrations(db, verbose=False):
+    """Apply pending migrations in order, then sync indexes; returns the versions applied by this call"""
+    migrations_collection = db[SCHEMA_MIGRATIONS_COLLECTION]
+    applied = []
+
+    for version, description, migrate in pending_migrations(db):
+        # Claim the version first so concurrent replicas never run it twice
+        claim = _claim(migrations_collection, version, description)
+        if claim == "applied":
+            continue
+        if claim == "busy":
+            # Another replica is mid-migration; later versions must wait for it
+            if verbose:
+                print(f"  [{version}] {description}: running elsewhere, stopping")
+            break
+
+        try:
+            migrate(db)
+        except Exception:
+            migrations_collection.delete_one({"_id": version, "state": "running"})
+            raise
+
+        migrations_collection.update_one(
+            {"_id": version},
+            {"$set": {"state": "applied", "applied_at": datetime.utcnow()}}
+        )
+        applied.append(version)
+        if verbose:
+            print(f"  [{version}] {description}: applied")
+
+    # Idempotent, so it also runs when another replica is still migrating
+    synced = sync_indexes(db)
+    if verbose:
+        print(f"  {len(synced)} managed index(es) synced")
+    return applied
+
+class _MigrationsPending(Exception):
+    """Another instance still holds a claim; raised so st.cache_resource keeps no result"""
+
+@st.cache_resource(show_spinner=False)
+def _migrate_once():
+    from database.connection import db
+    applied = run_migrations(db)
+    if pending_migrations(db):
+        raise _MigrationsPending()
+    return applied
+
+def ensure_migrations():
+    """Run pending migrations once per process; later reruns hit the cache unless another instance was still migrating"""
+    try:
+        return _migrate_once()
+    except _MigrationsPending:
+        return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply MediConsult database migrations")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    args = parser.parse_args()
+
+    from database.connection import db
+
+    if args.status:
+        states = {doc["_id"]: doc["state"] for doc in db[SCHEMA_MIGRATIONS_COLLECTION].find({}, {"state": 1})}
+        for version, description, _ in MIGRATIONS:
+            print(f"  [{version}] {description}: {states.get(version, 'pending')}")
+        return
+
+    applied = run_migrations(db, verbose=True)
+    print(f"{len(applied)} migration(s) applied")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# database/monitoring.py
+"""
+pymongo command instrumentation.
+
+CommandMonitor is registered on the shared client and records every command
+with the dashboard view that issued it (set by the Streamlit script thread via
+begin_rerun / set_view) into a bounded in-process ring buffer. Commands slower
+than SLOW_QUERY_MS are also written to the capped slow_queries collection.
+"""
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pymongo import monitoring
+from config import QUERY_LOG_SIZE, SLOW_QUERY_MS, SLOW_QUERIES_COLLECTION, SLOW_QUERY_LOG_BYTES
+
+_context = threading.local()
+_rerun_ids = itertools.count(1)
+
+def begin_rerun(view="app"):
+    """Start attributing commands on this thread to a new script run"""
+    _context.rerun_id = next(_rerun_ids)
+    _context.view = view
+    _context.db_ms = 0.0
+    _context.db_calls = 0
+
+def current_rerun_id():
+    return getattr(_context, "rerun_id", None)
+
+def db_time():
+    """(milliseconds, commands) spent in MongoDB by this thread during the current rerun"""
+    return getattr(_context, "db_ms", 0.0), getattr(_context, "db_calls", 0)
+
+def ignore_this_thread():
+    """Stop recording commands issued by the calling (background) thread"""
+    _context.ignored = True
+
+def set_view(view):
+    _context.view = view
+
+def current_view():
+    return getattr(_context, "view", None) or threading.current_thread().name
+
+def _docs_returned(reply):
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if "n" in reply:
+        return reply["n"]
+    return None
+
+def _shape(value):
+    """Operators and field names only; every literal becomes a type placeholder"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = _shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return f"<{type(value).__name__}>"
+
+def _redact(command):
+    # Keep the query shape, not the payload: filters and pipelines lose their
+    # literal values (emails, ids, search terms); sort / projection / limit are kept
+    redacted = {key: command[key] for key in ("sort", "projection", "limit") if key in command}
+    for key in ("filter", "query", "pipeline"):
+        if key in command:
+            redacted[key] = _shape(command[key])
+    return redacted
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-command latency, docs returned and per-rerun round trips, in bounded memory"""
+
+    IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "saslStart", "saslContinue", "endSessions"}
+
+    def __init__(self, log_size=QUERY_LOG_SIZE, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self.commands = deque(maxlen=log_size)
+        # (rerun_id, view) -> round trips; oldest reruns are dropped
+        self.round_trips = OrderedDict()
+        self.max_reruns = log_size
+        self._started = {}
+        self._lock = threading.Lock()
+        self._slow_log = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+
+    def attach_slow_log(self, database):
+        self._slow_log = database[SLOW_QUERIES_COLLECTION]
+
+    def started(self, event):
+        if event.command_name in self.IGNORED_COMMANDS or getattr(_context, "ignored", False):
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        if collection == SLOW_QUERIES_COLLECTION:
+            return
+        view = current_view()
+        rerun_id = getattr(_context, "rerun_id", None)
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = {
+                "command": event.command_name,
+                "collection": collection if isinstance(collection, str) else None,
+                "database": event.database_name,
+                "view": view,
+                "rerun_id": rerun_id,
+                "shape": _redact(event.command),
+            }
+            if rerun_id is not None:
+                key = (rerun_id, view)
+                self.round_trips[key] = self.round_trips.get(key, 0) + 1
+                self.round_trips.move_to_end(key)
+                while len(self.round_trips) > self.max_reruns:
+                    self.round_trips.popitem(last=False)
+
+    def _finish(self, event, reply=None, failure=None):
+        with self._lock:
+            record = self._started.pop((event.connection_id, event.request_id), None)
+        if record is None:
+            return
+        # Succeeded / failed events fire on the thread that issued the command
+        _context.db_ms = getattr(_context, "db_ms", 0.0) + event.duration_micros / 1000
+        _context.db_calls = getattr(_context, "db_calls", 0) + 1
+        record.update({
+            "duration_ms": event.duration_micros / 1000,
+            "docs_returned": _docs_returned(reply) if reply else None,
+            "failed": failure is not None,
+            "at": datetime.utcnow(),
+        })
+        self.commands.append(record)
+        if record["duration_ms"] >= self.slow_ms and self._slow_log is not None:
+            self._writer.submit(self._log_slow, dict(record))
+
+    def succeeded(self, event):
+        self._finish(event, reply=event.reply)
+
+    def failed(self, event):
+        self._finish(event, failure=event.failure)
+
+    def _log_slow(self, record):
+        try:
+            self._slow_log.insert_one(record)
+        except Exception:
+            pass  # never let the slow log break the app
+
+    # ---- reporting ----
+
+    def recent_commands(self):
+        return list(self.commands)
+
+    def round_trips_per_view(self):
+        """{view: [round trips for each recent rerun]}"""
+        per_view = {}
+        with self._lock:
+            items = list(self.round_trips.items())
+        for (_, view), count in items:
+            per_view.setdefault(view, []).append(count)
+        return per_view
+
+command_monitor = CommandMonitor()
+
+def ensure_slow_query_log(database):
+    """Create the capped slow_queries collection if it does not exist yet"""
+    if SLOW_QUERIES_COLLECTION not in database.list_collection_names(filter={"name": SLOW_QUERIES_COLLECTION}):
+        database.create_collection(SLOW_QUERIES_COLLECTION, capped=True, size=SLOW_QUERY_LOG_BYTES)
+
+def top_slow_queries(database, limit=20):
+    return list(database[SLOW_QUERIES_COLLECTION].find({}, {"_id": 0}).sort("duration_ms", -1).limit(limit))
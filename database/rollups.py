@@ -0,0 +1,148 @@
+# database/rollups.py
+"""
+Daily analytics rollups in the daily_stats collection.
+
+    python -m database.rollups            # incremental (days touched since the last run)
+    python -m database.rollups --full     # rebuild every day
+
+Two kinds of rows are kept:
+  consultations  - per (day, specialization, status): count and, for completed
+                   consultations, turnaround percentiles in hours
+  registrations  - per (day, user_type): new users
+
+Each run recomputes only the days that received changes since the previous
+run's watermark and $merges them into daily_stats. Turnaround percentiles use
+$percentile (MongoDB 7.0+).
+"""
+import argparse
+from datetime import datetime, timedelta
+from config import (
+    USERS_COLLECTION, CONSULTATIONS_COLLECTION, DAILY_STATS_COLLECTION, SETTINGS_COLLECTION
+)
+
+ROLLUP_STATE_ID = "daily_rollup"
+# Writes stamped just before a run may commit just after it
+WATERMARK_SAFETY_MARGIN = timedelta(minutes=5)
+
+def _day(field):
+    return {"$dateTrunc": {"date": f"${field}", "unit": "day"}}
+
+def _touched_days(collection, match):
+    return [row["_id"] for row in collection.aggregate([
+        {"$match": match},
+        {"$group": {"_id": _day("created_at")}}
+    ]) if row["_id"] is not None]
+
+def _days_filter(days):
+    # Each day is matched as a [day, day + 1) range so the created_at indexes apply
+    return {"$or": [{"created_at": {"$gte": day, "$lt": day + timedelta(days=1)}} for day in days]}
+
+def rollup_consultations(db, days=None):
+    """Recompute consultation rows for the given days (all days when None)"""
+    match = _days_filter(days) if days else {}
+    pipeline = [
+        {"$match": match},
+        {"$lookup": {
+            "from": USERS_COLLECTION,
+            "localField": "doctor_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "specialization": 1}}],
+            "as": "doctor"
+        }},
+        {"$project": {
+            "day": _day("created_at"),
+            "status": 1,
+            "specialization": {"$ifNull": [
+                "$doctor_specialization",
+                {"$ifNull": [{"$first": "$doctor.specialization"}, "Unknown"]}
+            ]},
+            "turnaround_h": {"$cond": [
+                {"$eq": ["$status", "completed"]},
+                {"$divide": [{"$subtract": ["$updated_at", "$created_at"]}, 3600 * 1000]},
+                None
+            ]}
+        }},
+        {"$group": {
+            "_id": {"kind": "consultations", "day": "$day", "specialization": "$specialization", "status": "$status"},
+            "count": {"$sum": 1},
+            "turnaround_h": {"$percentile": {"input": "$turnaround_h", "p": [0.5, 0.9, 0.95], "method": "approximate"}}
+        }},
+        {"$project": {
+            "kind": "$_id.kind",
+            "day": "$_id.day",
+            "specialization": "$_id.specialization",
+            "status": "$_id.status",
+            "count": 1,
+            "turnaround_p50_h": {"$arrayElemAt": ["$turnaround_h", 0]},
+            "turnaround_p90_h": {"$arrayElemAt": ["$turnaround_h", 1]},
+            "turnaround_p95_h": {"$arrayElemAt": ["$turnaround_h", 2]},
+            "rolled_up_at": "$$NOW"
+        }},
+        {"$merge": {"into": DAILY_STATS_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+    db[CONSULTATIONS_COLLECTION].aggregate(pipeline)
+
+def rollup_registrations(db, days=None):
+    match = _days_filter(days) if days else {"created_at": {"$exists": True}}
+    db[USERS_COLLECTION].aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"kind": "registrations", "day": _day("created_at"), "user_type": "$user_type"},
+            "count": {"$sum": 1}
+        }},
+        {"$project": {
+            "kind": "$_id.kind",
+            "day": "$_id.day",
+            "user_type": "$_id.user_type",
+            "count": 1,
+            "rolled_up_at": "$$NOW"
+        }},
+        {"$merge": {"into": DAILY_STATS_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ])
+
+def run_rollups(db, full=False):
+    """Incrementally refresh daily_stats; returns the number of days recomputed"""
+    started_at = datetime.utcnow()
+    state = db[SETTINGS_COLLECTION].find_one({"_id": ROLLUP_STATE_ID})
+    since = None if full or not state else state["watermark"]
+    daily_stats = db[DAILY_STATS_COLLECTION]
+
+    if since is None:
+        daily_stats.delete_many({})
+        rollup_consultations(db)
+        rollup_registrations(db)
+        days_recomputed = len(daily_stats.distinct("day"))
+    else:
+        consultation_days = _touched_days(db[CONSULTATIONS_COLLECTION], {"updated_at": {"$gte": since}})
+        registration_days = _touched_days(db[USERS_COLLECTION], {"created_at": {"$gte": since}})
+        if consultation_days:
+            # Groups can disappear (e.g. a day's last pending request completed)
+            daily_stats.delete_many({"kind": "consultations", "day": {"$in": consultation_days}})
+            rollup_consultations(db, consultation_days)
+        if registration_days:
+            rollup_registrations(db, registration_days)
+        days_recomputed = len(set(consultation_days) | set(registration_days))
+
+    db[SETTINGS_COLLECTION].update_one(
+        {"_id": ROLLUP_STATE_ID},
+        {"$set": {"watermark": started_at - WATERMARK_SAFETY_MARGIN, "last_run_at": started_at}},
+        upsert=True
+    )
+    return days_recomputed
+
+def get_daily_stats(db, kind, since):
+    return list(db[DAILY_STATS_COLLECTION].find(
+        {"kind": kind, "day": {"$gte": since}}, {"_id": 0, "rolled_up_at": 0}
+    ).sort("day", 1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh daily analytics rollups")
+    parser.add_argument("--full", action="store_true", help="rebuild every day instead of only changed days")
+    args = parser.parse_args()
+
+    from database.connection import db
+    days = run_rollups(db, full=args.full)
+    print(f"{days} day(s) rolled up")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,36 @@
 # mediconsult_app.py
 import streamlit as st
-import bcrypt
-from pymongo import MongoClient
-from datetime import datetime
+import os
+import tempfile
+import pandas as pd
+import plotly.express as px
+from datetime import datetime, timedelta
+from functools import partial
 from bson import ObjectId
 
 # =============================================
-# DATABASE CONNECTION (No imports needed)
+# DATABASE CONNECTION
 # =============================================
 
-# MongoDB Configuration
-client = MongoClient("mongodb://mongodb:27017/") 
-db = client["mediconsult"]
+# Shared, pooled client (one per process, reused across reruns and sessions)
+from database.connection import db
+from database.migrations import ensure_migrations
+from utils.sessions import start_session, restore_session, end_session
+from utils.rate_limit import login_allowed
+from utils import (
+    register_user, authenticate_user, get_all_doctors,
+    get_doctors_page, get_users_page, create_consultation, update_consultation
+)
+from utils.stats import get_dashboard_stats
+from database.export_consultations import export_consultations, changed_since_filter
+from database.rollups import run_rollups, get_daily_stats
+from database.monitoring import command_monitor, begin_rerun, top_slow_queries
+from utils.profiling import profiled, profile_view, fragment_view, show_profile_overlay, spans, export_traces
+from utils.pagination import find_page, paginated
+from utils.projections import CONSULTATION_PATIENT_HISTORY
+from utils.queue_sync import get_pending_queue
+from utils.live_updates import live_updates
+from config import QUEUE_REFRESH_SECONDS, EXPORT_UI_MAX_ROWS
 
 # Collections
 USERS_COLLECTION = "users"
@@ -33,122 +52,6 @@ SPECIALIZATIONS = [
     "General Physician"
 ]
 
-# =============================================
-# UTILITY FUNCTIONS
-# =============================================
-
-def hash_password(password):
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_bytes = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed_bytes.decode('utf-8')
-
-def verify_password(password, hashed):
-    pwd_bytes = password.encode('utf-8')
-    hashed_bytes = hashed.encode('utf-8')
-    return bcrypt.checkpw(pwd_bytes, hashed_bytes)
-
-def register_user(name, email, password, user_type, **kwargs):
-    users_collection = db[USERS_COLLECTION]
-    
-    # Check if user already exists
-    if users_collection.find_one({"email": email}):
-        return False, "User already exists"
-    
-    # Create new user
-    hashed_password = hash_password(password)
-    user_data = {
-        "name": name,
-        "email": email,
-        "password": hashed_password,
-        "user_type": user_type,
-        **kwargs,
-        "created_at": datetime.utcnow()
-    }
-    
-    result = users_collection.insert_one(user_data)
-    return True, "User registered successfully"
-
-def authenticate_user(email, password):
-    users_collection = db[USERS_COLLECTION]
-    user = users_collection.find_one({"email": email})
-    
-    if user and verify_password(password, user["password"]):
-        return True, user
-    return False, None
-
-def get_user_by_id(user_id):
-    users_collection = db[USERS_COLLECTION]
-    return users_collection.find_one({"_id": user_id})
-
-def get_doctors_by_specialization(specialization=None):
-    users_collection = db[USERS_COLLECTION]
-    query = {"user_type": "doctor"}
-    if specialization:
-        query["specialization"] = specialization
-    return list(users_collection.find(query))
-
-def get_all_doctors():
-    users_collection = db[USERS_COLLECTION]
-    return list(users_collection.find({"user_type": "doctor"}))
-
-def setup_database():
-    """Initialize database with admin and sample doctors"""
-    users_collection = db[USERS_COLLECTION]
-    
-    # Create admin user if not exists
-    admin_user = users_collection.find_one({"email": "admin@mediconsult.com"})
-    if not admin_user:
-        admin_data = {
-            "name": "System Administrator",
-            "email": "admin@mediconsult.com",
-            "password": hash_password("admin123"),
-            "user_type": "admin",
-            "phone": "+1234567890",
-            "created_at": datetime.utcnow()
-        }
-        users_collection.insert_one(admin_data)
-        st.sidebar.success("✅ Admin: admin@mediconsult.com / admin123")
-    
-    # Create sample doctors
-    sample_doctors = [
-        {
-            "name": "Sarah Wilson",
-            "email": "cardio@mediconsult.com",
-            "password": hash_password("doctor123"),
-            "user_type": "doctor",
-            "specialization": "Cardiologist",
-            "qualifications": "MD Cardiology, 10 years experience",
-            "consultation_fee": 100,
-            "available_hours": "Mon-Fri 9AM-5PM",
-            "phone": "+1234567891",
-            "is_available": True,
-            "created_at": datetime.utcnow()
-        },
-        {
-            "name": "Michael Chen",
-            "email": "derma@mediconsult.com",
-            "password": hash_password("doctor123"),
-            "user_type": "doctor",
-            "specialization": "Dermatologist",
-            "qualifications": "MD Dermatology, Skin specialist",
-            "consultation_fee": 80,
-            "available_hours": "Mon-Wed-Fri 10AM-6PM",
-            "phone": "+1234567892",
-            "is_available": True,
-            "created_at": datetime.utcnow()
-        }
-    ]
-    
-    for doctor in sample_doctors:
-        if not users_collection.find_one({"email": doctor["email"]}):
-            users_collection.insert_one(doctor)
-    
-    # Create indexes
-    users_collection.create_index("email", unique=True)
-    users_collection.create_index("user_type")
-    users_collection.create_index("specialization")
-
 # =============================================
 # STREAMLIT APP CONFIGURATION
 # =============================================
@@ -176,6 +79,78 @@ st.set_page_config(
 # DASHBOARD FUNCTIONS
 # =============================================
 
+@st.fragment
+@fragment_view("patient: Find Doctors")
+def doctor_cards(doctors, user_id):
+    """Booking a doctor reruns only the cards and the booking form, not the page queries"""
+    if st.session_state.get("booking_confirmation"):
+        st.success(st.session_state.pop("booking_confirmation"))
+    
+    for doctor in doctors:
+        with st.container():
+            st.subheader(f"Dr. {doctor['name']}")
+            st.write(f"**Specialization:** {doctor.get('specialization', 'Not specified')}")
+            st.write(f"**Qualifications:** {doctor.get('qualifications', 'Not provided')}")
+            st.write(f"**Fee:** ${doctor.get('consultation_fee', 'N/A')}")
+            
+            if st.button(f"Book Consultation", key=f"book_{doctor['_id']}"):
+                st.session_state.selected_doctor = doctor
+    
+    if st.session_state.get('selected_doctor'):
+        doctor = st.session_state.selected_doctor
+        st.markdown("""
+            <style>
+            .consultation-header {
+                color: #0d47a1;
+                font-size: 1.8rem;
+                font-weight: bold;
+                margin-bottom: 1.5rem;
+                padding: 10px;
+                background-color: #e3f2fd;
+                border-radius: 8px;
+                text-align: center;
+            }
+            </style>
+        """, unsafe_allow_html=True)
+        
+        st.markdown(f'<div class="consultation-header">📅 Book Consultation with Dr. {doctor["name"]}</div>', unsafe_allow_html=True)
+        
+        with st.form("quick_consultation"):
+            st.write(f"**Doctor:** Dr. {doctor['name']} ({doctor.get('specialization', 'General Physician')})")
+            st.write(f"**Fee:** ${doctor.get('consultation_fee', 'N/A')}")
+            
+            symptoms = st.text_area("Describe Your Symptoms", placeholder="Please describe your symptoms in detail...", height=100)
+            medical_history = st.text_area("Medical History (Optional)")
+            allergies = st.text_area("Allergies (Optional)")
+            
+            submitted = st.form_submit_button("Submit Consultation Request")
+            
+            if submitted:
+                if not symptoms:
+                    st.error("Please describe your symptoms")
+                else:
+                    consultation_data = {
+                        "patient_id": user_id,
+                        "doctor_id": doctor["_id"],
+                        "doctor_name": doctor["name"],
+                        "doctor_specialization": doctor.get("specialization"),
+                        "symptoms": symptoms,
+                        "medical_history": medical_history.split(',') if medical_history else [],
+                        "allergies": allergies.split(',') if allergies else [],
+                        "consultation_fee": doctor.get("consultation_fee"),
+                        "status": "pending",
+                        "created_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow()
+                    }
+                    
+                    result = create_consultation(consultation_data)
+                    
+                    if result.inserted_id:
+                        st.session_state.booking_confirmation = "✅ Consultation request submitted successfully!"
+                        st.session_state.selected_doctor = None
+                        st.rerun(scope="fragment")
+
+@profiled("patient")
 def patient_dashboard():
     st.title("👨‍💼 Patient Dashboard")
     
@@ -185,80 +160,19 @@ def patient_dashboard():
     # Sidebar navigation
     menu = ["Find Doctors", "New Consultation", "Consultation History"]
     choice = st.sidebar.selectbox("Navigation", menu)
+    profile_view(f"patient: {choice}")
+    live_updates(user_id, "patient")
     
     if choice == "Find Doctors":
         st.header("👨‍⚕️ Find Available Doctors")
         
-        doctors = get_all_doctors()
+        doctors = paginated("find_doctors", get_doctors_page)
         
         if not doctors:
             st.info("No doctors found.")
             return
         
-        for doctor in doctors:
-            with st.container():
-                st.subheader(f"Dr. {doctor['name']}")
-                st.write(f"**Specialization:** {doctor.get('specialization', 'Not specified')}")
-                st.write(f"**Qualifications:** {doctor.get('qualifications', 'Not provided')}")
-                st.write(f"**Fee:** ${doctor.get('consultation_fee', 'N/A')}")
-                
-                if st.button(f"Book Consultation", key=f"book_{doctor['_id']}"):
-                    st.session_state.selected_doctor = doctor
-                    st.rerun()
-        
-        if st.session_state.get('selected_doctor'):
-            doctor = st.session_state.selected_doctor
-            st.markdown("""
-                <style>
-                .consultation-header {
-                    color: #0d47a1;
-                    font-size: 1.8rem;
-                    font-weight: bold;
-                    margin-bottom: 1.5rem;
-                    padding: 10px;
-                    background-color: #e3f2fd;
-                    border-radius: 8px;
-                    text-align: center;
-                }
-                </style>
-            """, unsafe_allow_html=True)
-
-            st.markdown(f'<div class="consultation-header">📅 Book Consultation with Dr. {doctor["name"]}</div>', unsafe_allow_html=True)
-            
-            with st.form("quick_consultation"):
-                st.write(f"**Doctor:** Dr. {doctor['name']} ({doctor.get('specialization', 'General Physician')})")
-                st.write(f"**Fee:** ${doctor.get('consultation_fee', 'N/A')}")
-                
-                symptoms = st.text_area("Describe Your Symptoms", placeholder="Please describe your symptoms in detail...", height=100)
-                medical_history = st.text_area("Medical History (Optional)")
-                allergies = st.text_area("Allergies (Optional)")
-                
-                submitted = st.form_submit_button("Submit Consultation Request")
-                
-                if submitted:
-                    if not symptoms:
-                        st.error("Please describe your symptoms")
-                    else:
-                        consultation_data = {
-                            "patient_id": user_id,
-                            "doctor_id": doctor["_id"],
-                            "doctor_name": doctor["name"],
-                            "doctor_specialization": doctor.get("specialization"),
-                            "symptoms": symptoms,
-                            "medical_history": medical_history.split(',') if medical_history else [],
-                            "allergies": allergies.split(',') if allergies else [],
-                            "consultation_fee": doctor.get("consultation_fee"),
-                            "status": "pending",
-                            "created_at": datetime.utcnow(),
-                            "updated_at": datetime.utcnow()
-                        }
-                        
-                        result = consultations_collection.insert_one(consultation_data)
-                        
-                        if result.inserted_id:
-                            st.success("✅ Consultation request submitted successfully!")
-                            st.session_state.selected_doctor = None
-                            st.rerun()
+        doctor_cards(doctors, user_id)
     
     elif choice == "New Consultation":
         st.header("🆕 New Consultation")
@@ -268,10 +182,10 @@ def patient_dashboard():
             st.info("No doctors available.")
             return
         
-        doctor_options = {f"Dr. {doc['name']} ({doc.get('specialization')})": doc["_id"] for doc in doctors}
+        doctor_options = {f"Dr. {doc['name']} ({doc.get('specialization')})": doc for doc in doctors}
         selected_doctor_label = st.selectbox("Choose a Doctor", list(doctor_options.keys()))
-        selected_doctor_id = doctor_options[selected_doctor_label]
-        selected_doctor = get_user_by_id(selected_doctor_id)
+        selected_doctor = doctor_options[selected_doctor_label]
+        selected_doctor_id = selected_doctor["_id"]
         
         with st.form("consultation_form"):
             symptoms = st.text_area("Symptoms", placeholder="Describe your symptoms...")
@@ -287,13 +201,16 @@ def patient_dashboard():
                     "created_at": datetime.utcnow(),
                     "updated_at": datetime.utcnow()
                 }
-                consultations_collection.insert_one(consultation_data)
+                create_consultation(consultation_data)
                 st.success("Consultation request submitted!")
     
     elif choice == "Consultation History":
         st.header("📋 Consultation History")
         
-        consultations = list(consultations_collection.find({"patient_id": user_id}).sort("created_at", -1))
+        consultations = paginated(
+            f"consultation_history_{user_id}",
+            partial(find_page, consultations_collection, {"patient_id": user_id}, CONSULTATION_PATIENT_HISTORY)
+        )
         
         for consult in consultations:
             with st.expander(f"Consultation with Dr. {consult.get('doctor_name', 'Unknown')} - {consult['created_at'].strftime('%Y-%m-%d')}"):
@@ -301,62 +218,219 @@ def patient_dashboard():
                 st.write(f"**Status:** {consult['status']}")
                 st.write(f"**Diagnosis:** {consult.get('diagnosis', 'Not provided yet')}")
 
+@st.fragment
+@fragment_view("doctor: Pending Consultations")
+def pending_card(consult):
+    """One pending request; completing it reruns only this card"""
+    answered = st.session_state.setdefault("answered_consultations", {})
+    if consult["_id"] in answered:
+        st.success(f"✅ {answered[consult['_id']]}")
+        return
+    
+    patient_name = (consult["patient"] or {}).get("name", "Unknown Patient")
+    with st.expander(f"Consultation from {patient_name}"):
+        st.write(f"**Symptoms:** {consult['symptoms']}")
+        
+        with st.form(key=f"response_{consult['_id']}"):
+            diagnosis = st.text_area("Diagnosis")
+            prescription = st.text_area("Prescription")
+            
+            if st.form_submit_button("Complete Consultation"):
+                if update_consultation(consult["_id"], consult["status"], {
+                    "diagnosis": diagnosis,
+                    "prescription": prescription,
+                    "status": "completed",
+                    "updated_at": datetime.utcnow()
+                }):
+                    answered[consult["_id"]] = f"Consultation from {patient_name} completed."
+                    st.rerun(scope="fragment")
+                else:
+                    st.error("Failed to update consultation - it was already answered elsewhere")
+
+@st.fragment(run_every=QUEUE_REFRESH_SECONDS)
+@fragment_view("doctor: Pending Consultations")
+def pending_queue(doctor_id):
+    """Delta-syncs the queue on every run: page load, Refresh, or the auto-refresh timer"""
+    queue = get_pending_queue(doctor_id)
+    queue.sync()
+    
+    st.header(f"🆕 Pending Consultations ({len(queue)})")
+    col1, col2 = st.columns([4, 1])
+    col1.caption(f"Last synced {queue.synced_at.strftime('%H:%M:%S')} UTC")
+    col2.button("🔄 Refresh", key="refresh_pending_queue")
+    
+    # Synced queue no longer holds answered consultations
+    st.session_state.answered_consultations = {}
+    for consult in queue.items():
+        pending_card(consult)
+
+@profiled("doctor")
 def doctor_dashboard():
     st.title("👨‍⚕️ Doctor Dashboard")
+    profile_view("doctor: Pending Consultations")
     
     user_id = st.session_state.user_id
-    consultations_collection = db[CONSULTATIONS_COLLECTION]
+    live_updates(user_id, "doctor")
+    pending_queue(user_id)
+
+@profiled("admin: analytics")
+def show_analytics():
+    st.subheader("Analytics")
     
-    # Get pending consultations
-    pending_consultations = list(consultations_collection.find({
-        "doctor_id": user_id,
-        "status": "pending"
-    }))
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        days = st.selectbox("Period", [30, 90, 365], format_func=lambda d: f"Last {d} days")
+    with col2:
+        if st.button("🔄 Refresh Rollups"):
+            with st.spinner("Rolling up new activity..."):
+                run_rollups(db)
     
-    st.header(f"🆕 Pending Consultations ({len(pending_consultations)})")
+    since = datetime.utcnow() - timedelta(days=days)
+    consultations = pd.DataFrame(get_daily_stats(db, "consultations", since))
+    registrations = pd.DataFrame(get_daily_stats(db, "registrations", since))
     
-    for consult in pending_consultations:
-        patient = get_user_by_id(consult["patient_id"])
-        with st.expander(f"Consultation from {patient['name']}"):
-            st.write(f"**Symptoms:** {consult['symptoms']}")
-            
-            with st.form(key=f"response_{consult['_id']}"):
-                diagnosis = st.text_area("Diagnosis")
-                prescription = st.text_area("Prescription")
-                
-                if st.form_submit_button("Complete Consultation"):
-                    consultations_collection.update_one(
-                        {"_id": consult["_id"]},
-                        {"$set": {
-                            "diagnosis": diagnosis,
-                            "prescription": prescription,
-                            "status": "completed",
-                            "updated_at": datetime.utcnow()
-                        }}
-                    )
-                    st.success("Consultation completed!")
-                    st.rerun()
+    if consultations.empty and registrations.empty:
+        st.info("No rollups yet. Click Refresh Rollups or run `python -m database.rollups`.")
+        return
+    
+    if not consultations.empty:
+        per_specialization = consultations.groupby(["day", "specialization"], as_index=False)["count"].sum()
+        st.plotly_chart(px.bar(per_specialization, x="day", y="count", color="specialization",
+                               title="Consultations per Day by Specialization"), use_container_width=True)
+        
+        per_status = consultations.groupby(["day", "status"], as_index=False)["count"].sum()
+        st.plotly_chart(px.area(per_status, x="day", y="count", color="status",
+                                title="Consultations per Day by Status"), use_container_width=True)
+        
+        completed = consultations[consultations["status"] == "completed"]
+        if not completed.empty:
+            turnaround = completed.groupby("day", as_index=False)[
+                ["turnaround_p50_h", "turnaround_p90_h", "turnaround_p95_h"]
+            ].max()
+            st.plotly_chart(px.line(turnaround, x="day", y=["turnaround_p50_h", "turnaround_p90_h", "turnaround_p95_h"],
+                                    title="Turnaround Percentiles, slowest specialization (hours)"), use_container_width=True)
+    
+    if not registrations.empty:
+        st.plotly_chart(px.bar(registrations, x="day", y="count", color="user_type",
+                               title="New Registrations per Day"), use_container_width=True)
+
+@profiled("admin: performance")
+def show_performance():
+    st.header("⚡ Performance")
+    
+    # Round trips per rerun, by view (this process only)
+    round_trips = command_monitor.round_trips_per_view()
+    if round_trips:
+        st.subheader("Database Round Trips per Rerun")
+        st.dataframe(pd.DataFrame([
+            {
+                "view": view,
+                "reruns": len(counts),
+                "avg round trips": sum(counts) / len(counts),
+                "max round trips": max(counts)
+            }
+            for view, counts in round_trips.items()
+        ]).sort_values("avg round trips", ascending=False), use_container_width=True, hide_index=True)
+    
+    recent = command_monitor.recent_commands()
+    if recent:
+        st.subheader("Command Latency by View")
+        commands = pd.DataFrame(recent)
+        st.dataframe(
+            commands.groupby(["view", "command", "collection"], dropna=False)
+            .agg(count=("duration_ms", "size"), avg_ms=("duration_ms", "mean"), max_ms=("duration_ms", "max"),
+                 docs_returned=("docs_returned", "sum"))
+            .reset_index().sort_values("avg_ms", ascending=False),
+            use_container_width=True, hide_index=True
+        )
+    
+    if spans:
+        st.subheader("Render Profile by Section")
+        sections = pd.DataFrame(list(spans))
+        st.dataframe(
+            sections.groupby("name")
+            .agg(renders=("wall_ms", "size"), avg_ms=("wall_ms", "mean"), p95_ms=("wall_ms", lambda ms: ms.quantile(0.95)),
+                 avg_db_ms=("db_ms", "mean"), avg_db_calls=("db_calls", "mean"), avg_elements=("elements", "mean"))
+            .reset_index().sort_values("avg_ms", ascending=False),
+            use_container_width=True, hide_index=True
+        )
+        st.download_button("📥 Download render traces (JSON)", export_traces(),
+                           file_name="render_traces.json", mime="application/json")
+    
+    st.subheader("Top Slow Queries")
+    slow_queries = top_slow_queries(db)
+    if not slow_queries:
+        st.info("No slow queries recorded.")
+        return
+    for query in slow_queries:
+        with st.expander(f"{query['duration_ms']:.0f} ms - {query['command']} {query.get('collection') or ''} ({query['view']})"):
+            st.write(f"**At:** {query['at'].strftime('%Y-%m-%d %H:%M:%S')}")
+            st.write(f"**Docs returned:** {query.get('docs_returned')}")
+            st.json(query.get("shape", {}), expanded=True)
 
+@profiled("admin")
 def admin_dashboard():
     st.title("🔧 Admin Dashboard")
     
-    users_collection = db[USERS_COLLECTION]
-    consultations_collection = db[CONSULTATIONS_COLLECTION]
+    menu = ["Overview", "Performance"]
+    choice = st.sidebar.selectbox("Navigation", menu)
+    profile_view(f"admin: {choice}")
+    
+    if choice == "Performance":
+        show_performance()
+        return
     
-    # Statistics
-    total_users = users_collection.count_documents({})
-    total_patients = users_collection.count_documents({"user_type": "patient"})
-    total_doctors = users_collection.count_documents({"user_type": "doctor"})
-    total_consultations = consultations_collection.count_documents({})
+    # Statistics (single stats document / $facet aggregation)
+    stats = get_dashboard_stats()
+    users_by_type = stats.get("users_by_type", {})
     
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Users", total_users)
-    col2.metric("Patients", total_patients)
-    col3.metric("Doctors", total_doctors)
-    col4.metric("Consultations", total_consultations)
+    col1.metric("Total Users", stats.get("users_total", 0))
+    col2.metric("Patients", users_by_type.get("patient", 0))
+    col3.metric("Doctors", users_by_type.get("doctor", 0))
+    col4.metric("Consultations", stats.get("consultations_total", 0))
+    
+    show_analytics()
+    
+    st.subheader("Export Consultations")
+    export_format = st.selectbox("Format", ["parquet", "csv"])
+    since = st.date_input("Only consultations changed since (optional)", value=None)
+    if st.button("Prepare Export"):
+        watermark = datetime.combine(since, datetime.min.time()) if since else None
+        matching = db[CONSULTATIONS_COLLECTION].count_documents(changed_since_filter(watermark))
+        if matching > EXPORT_UI_MAX_ROWS:
+            st.error(f"{matching} consultations match - too many to export here (limit {EXPORT_UI_MAX_ROWS}). "
+                     "Use `python -m database.export_consultations` instead.")
+        else:
+            # Staged on disk, not in memory or session state
+            output = tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False)
+            try:
+                with output, st.spinner("Exporting consultations..."):
+                    exported, _ = export_consultations(db, output, export_format, watermark)
+            except BaseException:
+                # Never leave a half-written export behind
+                os.remove(output.name)
+                raise
+            st.session_state.consultation_export = (output.name, export_format, exported)
+    
+    # Offered once: the next rerun drops the button and the temp file is already gone
+    export = st.session_state.pop("consultation_export", None)
+    if export:
+        path, export_format, exported = export
+        try:
+            with open(path, "rb") as export_file:
+                st.download_button(
+                    f"⬇️ Download {exported} consultations ({export_format})",
+                    data=export_file,
+                    file_name=f"consultations_{datetime.utcnow().strftime('%Y%m%d')}.{export_format}",
+                    mime="text/csv" if export_format == "csv" else "application/octet-stream",
+                    on_click="ignore"
+                )
+        finally:
+            os.remove(path)
     
     st.subheader("User Management")
-    users = list(users_collection.find({}, {"password": 0}))
+    users = paginated("user_management", get_users_page)
     
     for user in users:
         st.write(f"**{user['name']}** ({user['user_type']}) - {user['email']}")
@@ -366,15 +440,20 @@ def admin_dashboard():
 # =============================================
 
 def main():
+    # Attribute database commands issued by this script run
+    begin_rerun("app")
+    
     # Initialize session state
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
         st.session_state.user_id = None
         st.session_state.user_type = None
         st.session_state.user_name = None
+        # Resume a signed session token (refresh / reconnect) without re-authenticating
+        restore_session()
     
-    # Setup database (creates admin user if needed)
-    setup_database()
+    # Bootstrap database once per process (admin, sample doctors, indexes)
+    ensure_migrations()
     
     # Header
     st.markdown('<h1 style="text-align: center; color: #1f77b4;">🏥 MediConsult</h1>', unsafe_allow_html=True)
@@ -392,16 +471,16 @@ def main():
                 submitted = st.form_submit_button("Login")
                 
                 if submitted:
-                    success, user = authenticate_user(email, password)
-                    if success and user["user_type"].lower() == user_type.lower():
-                        st.session_state.logged_in = True
-                        st.session_state.user_id = user["_id"]
-                        st.session_state.user_type = user["user_type"]
-                        st.session_state.user_name = user["name"]
-                        st.success(f"Welcome back, {user['name']}!")
-                        st.rerun()
+                    if not login_allowed(email):
+                        st.error("Too many login attempts. Please wait a minute and try again.")
                     else:
-                        st.error("Invalid credentials")
+                        success, user = authenticate_user(email, password)
+                        if success and user["user_type"].lower() == user_type.lower():
+                            start_session(user)
+                            st.success(f"Welcome back, {user['name']}!")
+                            st.rerun()
+                        else:
+                            st.error("Invalid credentials")
         
         with tab2:
             with st.form("register_form"):
@@ -432,10 +511,7 @@ def main():
         st.sidebar.write(f"Role: {st.session_state.user_type.title()}")
         
         if st.sidebar.button("🚪 Logout"):
-            st.session_state.logged_in = False
-            st.session_state.user_id = None
-            st.session_state.user_type = None
-            st.session_state.user_name = None
+            end_session()
             st.rerun()
         
         # Route to appropriate dashboard
@@ -445,6 +521,8 @@ def main():
             doctor_dashboard()
         elif st.session_state.user_type == "admin":
             admin_dashboard()
+    
+    show_profile_overlay()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,6 +2,11 @@
 import streamlit as st
 from datetime import datetime
 from database.connection import db
+from database.migrations import ensure_migrations
+from database.monitoring import begin_rerun
+from utils.profiling import show_profile_overlay
+from utils.sessions import start_session, restore_session, end_session
+from utils.rate_limit import login_allowed
 from utils import register_user, authenticate_user, get_user_by_id
 from config import USERS_COLLECTION, USER_TYPE_PATIENT, USER_TYPE_DOCTOR, SPECIALIZATIONS
 
@@ -14,11 +19,19 @@ st.set_page_config(
 )
 
 def main():
+    # Attribute database commands issued by this script run
+    begin_rerun("app")
+    
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
         st.session_state.user_id = None
         st.session_state.user_type = None
         st.session_state.user_name = None
+        # Resume a signed session token (refresh / reconnect) without re-authenticating
+        restore_session()
+    
+    # Bootstrap database once per process (admin, sample doctors, indexes)
+    ensure_migrations()
     
     # Custom CSS
     st.markdown("""
@@ -45,6 +58,8 @@ def main():
         show_login_register()
     else:
         show_dashboard()
+    
+    show_profile_overlay()
 
 def show_login_register():
     tab1, tab2, tab3 = st.tabs(["🔐 Login", "📝 Register", "ℹ️ About"])
@@ -60,13 +75,12 @@ def show_login_register():
             submitted = st.form_submit_button("Login")
             
             if submitted:
-                if email and password:
+                if email and password and not login_allowed(email):
+                    st.error("Too many login attempts. Please wait a minute and try again.")
+                elif email and password:
                     success, user = authenticate_user(email, password)
                     if success and user["user_type"].lower() == user_type.lower():
-                        st.session_state.logged_in = True
-                        st.session_state.user_id = user["_id"]
-                        st.session_state.user_type = user["user_type"]
-                        st.session_state.user_name = user["name"]
+                        start_session(user)
                         st.success(f"Welcome back, {user['name']}!")
                         st.rerun()
                     else:
@@ -164,10 +178,7 @@ def show_dashboard():
         st.write(f"Role: {st.session_state.user_type.title()}")
         
         if st.button("🚪 Logout"):
-            st.session_state.logged_in = False
-            st.session_state.user_id = None
-            st.session_state.user_type = None
-            st.session_state.user_name = None
+            end_session()
             st.rerun()
     
     # Route to appropriate dashboard
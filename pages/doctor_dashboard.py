@@ -1,10 +1,155 @@
 # pages/doctor_dashboard.py
 import streamlit as st
 from datetime import datetime
+from functools import partial
 from database.connection import db
-from config import CONSULTATIONS_COLLECTION
-from utils import get_user_by_id
+from utils.profiling import profiled, profile_view, fragment_view
+from utils.live_updates import live_updates
+from config import CONSULTATIONS_COLLECTION, QUEUE_REFRESH_SECONDS
+from utils import attach_users, update_consultation
+from utils.pagination import find_page, paginated, reset_pagination
+from utils.search import search_consultations
+from utils.stats import get_doctor_summary
+from utils.lab_reports import get_lab_reports, open_lab_report
+from utils.previews import get_preview
+from utils.queue_sync import get_pending_queue
+from utils.projections import CONSULTATION_DOCTOR_HISTORY, CONSULTATION_ROW
 
+def read_lab_report(report):
+    with open_lab_report(report) as stream:
+        return stream.read()
+
+def show_lab_reports(consultation_id):
+    for report in get_lab_reports(consultation_id):
+        report_data = report["report_data"]
+        caption = f"{report_data['filename']} ({report_data['size'] / 1024:.0f} KB)"
+        preview = get_preview(report_data["sha256"])
+        if preview:
+            st.image(bytes(preview["data"]), caption=caption)
+        else:
+            st.caption(f"📄 {caption} - preview not available yet")
+        # The preview is only a thumbnail; the blob is read when the button is clicked
+        st.download_button(
+            "📥 Download report",
+            data=partial(read_lab_report, report),
+            file_name=report_data["filename"],
+            mime=report_data.get("content_type") or "application/octet-stream",
+            key=f"lab_report_{report['_id']}",
+            on_click="ignore"
+        )
+
+def show_search_results(doctor_id, search_query):
+    # Start from the first page whenever the query changes
+    if st.session_state.get("history_search_query") != search_query:
+        st.session_state.history_search_query = search_query
+        reset_pagination(f"history_search_{doctor_id}")
+    
+    results = attach_users(paginated(
+        f"history_search_{doctor_id}",
+        partial(search_consultations, search_query, doctor_id=doctor_id)
+    ), "patient_id", "patient")
+    
+    if not results:
+        st.info("No matching consultations found.")
+        return
+    
+    for consult in results:
+        patient_name = (consult["patient"] or {}).get("name", "Unknown Patient")
+        with st.expander(f"{patient_name} - {consult['created_at'].strftime('%Y-%m-%d %H:%M')} - {consult['status']}"):
+            st.write(f"**Symptoms:** {consult['symptoms']}")
+            st.write(f"**Diagnosis:** {consult.get('diagnosis') or 'Not provided'}")
+            st.write(f"**Prescription:** {consult.get('prescription') or 'Not provided'}")
+            st.write(f"**Consultation Notes:** {consult.get('consultation_notes') or 'Not provided'}")
+
+@st.fragment
+@fragment_view("doctor: New Consultations")
+def consultation_card(consult):
+    """One pending request; toggling reports or submitting reruns only this card"""
+    answered = st.session_state.setdefault("answered_consultations", {})
+    if consult["_id"] in answered:
+        st.success(f"✅ {answered[consult['_id']]}")
+        return
+    
+    patient = consult["patient"] or {}
+    patient_name = patient.get("name", "Unknown Patient")
+    
+    with st.expander(f"Consultation Request from {patient_name} - {consult['created_at'].strftime('%Y-%m-%d %H:%M')}"):
+        st.subheader("Patient Information")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write(f"**Name:** {patient_name}")
+            st.write(f"**Age:** {patient.get('age', 'Not provided')}")
+            st.write(f"**Gender:** {patient.get('gender', 'Not provided')}")
+        
+        with col2:
+            st.write(f"**Allergies:** {', '.join(consult.get('allergies', []))}")
+            st.write(f"**Medical History:** {', '.join(consult.get('medical_history', []))}")
+        
+        st.subheader("Current Symptoms")
+        st.write(consult["symptoms"])
+        
+        # Lab reports are only fetched once the doctor asks to see them
+        if consult.get("lab_reports"):
+            if st.toggle(f"Show lab reports ({len(consult['lab_reports'])})", key=f"lab_reports_{consult['_id']}"):
+                show_lab_reports(consult["_id"])
+        
+        # Doctor's response form
+        with st.form(key=f"response_form_{consult['_id']}"):
+            diagnosis = st.text_area("Diagnosis")
+            prescription = st.text_area("Prescription")
+            lab_requests = st.text_area("Lab Requests (one per line)")
+            consultation_notes = st.text_area("Consultation Notes")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                status = st.selectbox("Status", ["in_progress", "completed"], key=f"status_{consult['_id']}")
+            
+            with col2:
+                st.write("")  # Spacer
+                submitted = st.form_submit_button("Update Consultation")
+            
+            if submitted:
+                update_data = {
+                    "diagnosis": diagnosis,
+                    "prescription": prescription,
+                    "consultation_notes": consultation_notes,
+                    "status": status,
+                    "updated_at": datetime.utcnow()
+                }
+                
+                if lab_requests:
+                    update_data["lab_requests"] = [req.strip() for req in lab_requests.split('\n') if req.strip()]
+                
+                if update_consultation(consult["_id"], consult["status"], update_data):
+                    answered[consult["_id"]] = f"Consultation from {patient_name} updated ({status.replace('_', ' ')})."
+                    st.rerun(scope="fragment")
+                else:
+                    st.error("Failed to update consultation")
+
+@st.fragment(run_every=QUEUE_REFRESH_SECONDS)
+@fragment_view("doctor: New Consultations")
+def pending_queue(doctor_id):
+    """Delta-syncs the queue on every run: page load, Refresh, or the auto-refresh timer"""
+    queue = get_pending_queue(doctor_id)
+    queue.sync()
+    
+    col1, col2 = st.columns([4, 1])
+    col1.caption(f"{len(queue)} pending - last synced {queue.synced_at.strftime('%H:%M:%S')} UTC")
+    # Clicking reruns this fragment, which syncs
+    col2.button("🔄 Refresh", key="refresh_pending_queue")
+    
+    if not len(queue):
+        st.info("No new consultation requests.")
+        return
+    
+    # Synced queue no longer holds answered consultations
+    st.session_state.answered_consultations = {}
+    for consult in queue.items():
+        consultation_card(consult)
+
+@profiled("doctor")
 def doctor_dashboard():
     st.title("👨‍⚕️ Doctor Dashboard")
     
@@ -18,88 +163,29 @@ def doctor_dashboard():
     # Sidebar navigation
     menu = ["New Consultations", "Patient History", "My Consultations"]
     choice = st.sidebar.selectbox("Navigation", menu)
+    profile_view(f"doctor: {choice}")
+    live_updates(user_id, "doctor")
     
     consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
     
     if choice == "New Consultations":
         st.header("🆕 New Consultation Requests")
         
-        # Get pending consultations for this doctor
-        pending_consultations = list(consultations_collection.find({
-            "doctor_id": user_id,
-            "status": "pending"
-        }).sort("created_at", -1))
-        
-        if not pending_consultations:
-            st.info("No new consultation requests.")
-            return
-        
-        for consult in pending_consultations:
-            patient = get_user_by_id(consult["patient_id"])
-            patient_name = patient["name"] if patient else "Unknown Patient"
-            
-            with st.expander(f"Consultation Request from {patient_name} - {consult['created_at'].strftime('%Y-%m-%d %H:%M')}"):
-                st.subheader("Patient Information")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write(f"**Name:** {patient_name}")
-                    st.write(f"**Age:** {patient.get('age', 'Not provided')}")
-                    st.write(f"**Gender:** {patient.get('gender', 'Not provided')}")
-                
-                with col2:
-                    st.write(f"**Allergies:** {', '.join(consult.get('allergies', []))}")
-                    st.write(f"**Medical History:** {', '.join(consult.get('medical_history', []))}")
-                
-                st.subheader("Current Symptoms")
-                st.write(consult["symptoms"])
-                
-                # Doctor's response form
-                with st.form(key=f"response_form_{consult['_id']}"):
-                    diagnosis = st.text_area("Diagnosis")
-                    prescription = st.text_area("Prescription")
-                    lab_requests = st.text_area("Lab Requests (one per line)")
-                    consultation_notes = st.text_area("Consultation Notes")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        status = st.selectbox("Status", ["in_progress", "completed"], key=f"status_{consult['_id']}")
-                    
-                    with col2:
-                        st.write("")  # Spacer
-                        submitted = st.form_submit_button("Update Consultation")
-                    
-                    if submitted:
-                        update_data = {
-                            "diagnosis": diagnosis,
-                            "prescription": prescription,
-                            "consultation_notes": consultation_notes,
-                            "status": status,
-                            "updated_at": datetime.utcnow()
-                        }
-                        
-                        if lab_requests:
-                            update_data["lab_requests"] = [req.strip() for req in lab_requests.split('\n') if req.strip()]
-                        
-                        result = consultations_collection.update_one(
-                            {"_id": consult["_id"]},
-                            {"$set": update_data}
-                        )
-                        
-                        if result.modified_count > 0:
-                            st.success("Consultation updated successfully!")
-                            st.rerun()
-                        else:
-                            st.error("Failed to update consultation")
+        pending_queue(user_id)
     
     elif choice == "Patient History":
         st.header("📋 Patient History")
         
-        # Get all patients who consulted this doctor
-        patient_consultations = list(consultations_collection.find({
-            "doctor_id": user_id
-        }).sort("created_at", -1))
+        search_query = st.text_input("🔍 Search symptoms, diagnoses, prescriptions and notes")
+        if search_query.strip():
+            show_search_results(user_id, search_query.strip())
+            return
+        
+        # One keyset page of this doctor's consultations, grouped by patient below
+        patient_consultations = attach_users(paginated(
+            f"patient_history_{user_id}",
+            partial(find_page, consultations_collection, {"doctor_id": user_id}, CONSULTATION_DOCTOR_HISTORY)
+        ), "patient_id", "patient")
         
         if not patient_consultations:
             st.info("No patient history found.")
@@ -110,9 +196,8 @@ def doctor_dashboard():
         for consult in patient_consultations:
             patient_id = consult["patient_id"]
             if patient_id not in patients_data:
-                patient = get_user_by_id(patient_id)
                 patients_data[patient_id] = {
-                    "patient_info": patient,
+                    "patient_info": consult["patient"] or {"name": "Unknown Patient"},
                     "consultations": []
                 }
             patients_data[patient_id]["consultations"].append(consult)
@@ -132,29 +217,36 @@ def doctor_dashboard():
     elif choice == "My Consultations":
         st.header("📊 My Consultations Overview")
         
-        all_consultations = list(consultations_collection.find({
-            "doctor_id": user_id
-        }).sort("created_at", -1))
+        summary = get_doctor_summary(user_id)
         
-        if not all_consultations:
+        if not summary["total"]:
             st.info("No consultations found.")
             return
         
-        # Statistics
-        total_consultations = len(all_consultations)
-        pending_count = len([c for c in all_consultations if c["status"] == "pending"])
-        completed_count = len([c for c in all_consultations if c["status"] == "completed"])
+        # Statistics (server-side aggregation, no consultation bodies loaded)
+        avg_turnaround = summary["avg_turnaround"]
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Consultations", summary["total"])
+        col2.metric("Pending", summary["by_status"].get("pending", 0))
+        col3.metric("Completed", summary["by_status"].get("completed", 0))
+        col4.metric("Avg. Turnaround", f"{avg_turnaround.total_seconds() / 3600:.1f} h" if avg_turnaround else "N/A")
         
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Total Consultations", total_consultations)
-        col2.metric("Pending", pending_count)
-        col3.metric("Completed", completed_count)
+        if summary["oldest_pending"]:
+            st.caption(f"Oldest pending request: {summary['oldest_pending'].strftime('%Y-%m-%d %H:%M')}")
         
-        # Display all consultations
+        # Display all consultations (only loaded on request, one page at a time)
         st.subheader("All Consultations")
+        if not st.checkbox("Show consultation list", key="show_my_consultations"):
+            return
+        
+        all_consultations = attach_users(paginated(
+            f"my_consultations_{user_id}",
+            partial(find_page, consultations_collection, {"doctor_id": user_id}, CONSULTATION_ROW)
+        ), "patient_id", "patient")
+        
         for consult in all_consultations:
-            patient = get_user_by_id(consult["patient_id"])
-            patient_name = patient["name"] if patient else "Unknown Patient"
+            patient_name = (consult["patient"] or {}).get("name", "Unknown Patient")
             
             status_color = {
                 "pending": "🟡",
@@ -1,11 +1,125 @@
 # pages/patient_dashboard.py
 import streamlit as st
 from datetime import datetime
+from functools import partial
 from database.connection import db
+from utils.profiling import profiled, profile_view, fragment_view
+from utils.live_updates import live_updates
 from models import Consultation
 from config import CONSULTATIONS_COLLECTION, SPECIALIZATIONS
-from utils import get_doctors_by_specialization, get_user_by_id
+from utils import (
+    get_doctors_by_specialization, attach_users, create_consultation, create_auto_assigned_consultation
+)
+from utils.pagination import find_page, paginated, DEFAULT_PAGE_SIZE
+from utils.lab_reports import save_lab_reports
+from utils.projections import USER_NAME, CONSULTATION_OPTION, CONSULTATION_FOLLOW_UP, CONSULTATION_PATIENT_HISTORY
 
+AUTO_ASSIGN_LABEL = "⚡ Auto-assign me to the doctor with the shortest wait"
+
+@st.fragment
+@fragment_view("patient: New Consultation")
+def new_consultation_form(user_id):
+    """Submitting reruns only this form, not the dashboard queries around it"""
+    # Outside the form so the doctor list follows the chosen specialization
+    st.subheader("Select Specialist")
+    specialization = st.selectbox("Specialization", SPECIALIZATIONS, key="new_consultation_specialization")
+    doctors = get_doctors_by_specialization(specialization)
+    doctor_options = {f"{doc['name']} ({doc['specialization']})": doc["_id"] for doc in doctors}
+    
+    auto_assign = False
+    doctor_id = None
+    if doctor_options:
+        auto_assign = st.checkbox(AUTO_ASSIGN_LABEL, key="new_consultation_auto_assign")
+        if not auto_assign:
+            selected_doctor = st.selectbox("Available Doctors", list(doctor_options.keys()), index=None,
+                                           placeholder="Choose a doctor…", key="new_consultation_doctor")
+            doctor_id = doctor_options.get(selected_doctor)
+    else:
+        st.warning("No doctors available for this specialization")
+    
+    with st.form("new_consultation"):
+        st.subheader("Personal Information")
+        age = st.number_input("Age", min_value=1, max_value=120)
+        gender = st.selectbox("Gender", ["Male", "Female", "Other"])
+        allergies = st.text_area("Allergies (comma separated)")
+        medical_history = st.text_area("Medical History")
+        
+        st.subheader("Medical Information")
+        symptoms = st.text_area("Current Symptoms", placeholder="Describe your symptoms in detail...")
+        
+        st.subheader("Upload Lab Reports (Optional)")
+        uploaded_files = st.file_uploader("Upload lab reports", accept_multiple_files=True, 
+                                        type=['pdf', 'jpg', 'jpeg', 'png'])
+        
+        submitted = st.form_submit_button("Submit Consultation Request")
+        
+        if submitted:
+            if not (auto_assign or doctor_id):
+                if doctor_options:
+                    st.error("Choose a doctor or tick auto-assign")
+                return
+            
+            consultation_data = Consultation(
+                patient_id=user_id,
+                doctor_id=doctor_id,
+                symptoms=symptoms,
+                medical_history=medical_history.split(',') if medical_history else [],
+                allergies=allergies.split(',') if allergies else [],
+                status="pending"
+            )
+            
+            if auto_assign:
+                # Routes to whichever available doctor of this specialization has the shortest queue
+                result, doctor = create_auto_assigned_consultation(consultation_data.to_dict(), specialization)
+                if result is None:
+                    st.error("No doctors are currently available for this specialization")
+                    return
+                doctor_id = doctor["_id"]
+            else:
+                result = create_consultation(consultation_data.to_dict())
+            
+            if result.inserted_id:
+                save_lab_reports(uploaded_files, result.inserted_id, user_id, doctor_id)
+                if auto_assign:
+                    st.success(f"Consultation request submitted and assigned to Dr. {doctor['name']}!")
+                else:
+                    st.success("Consultation request submitted successfully!")
+            else:
+                st.error("Failed to submit consultation request")
+
+@st.fragment
+@fragment_view("patient: Re-consultation")
+def re_consultation_form(user_id, selected_consultation):
+    with st.form("re_consultation"):
+        st.subheader("New Information")
+        new_symptoms = st.text_area("New Symptoms or Updates")
+        
+        st.subheader("Upload New Lab Reports")
+        new_uploads = st.file_uploader("Upload new lab reports", accept_multiple_files=True,
+                                     type=['pdf', 'jpg', 'jpeg', 'png'])
+        
+        submitted = st.form_submit_button("Submit Re-consultation")
+        
+        if submitted:
+            # Create new consultation referencing the previous one
+            new_consultation = Consultation(
+                patient_id=user_id,
+                doctor_id=selected_consultation["doctor_id"],
+                symptoms=f"Follow-up: {selected_consultation['symptoms']}\nNew: {new_symptoms}",
+                medical_history=selected_consultation.get("medical_history", []),
+                allergies=selected_consultation.get("allergies", []),
+                status="pending"
+            )
+            
+            result = create_consultation(new_consultation.to_dict())
+            
+            if result.inserted_id:
+                save_lab_reports(new_uploads, result.inserted_id, user_id, selected_consultation["doctor_id"])
+                st.success("Re-consultation request submitted successfully!")
+            else:
+                st.error("Failed to submit re-consultation request")
+
+@profiled("patient")
 def patient_dashboard():
     st.title("👨‍💼 Patient Dashboard")
     
@@ -19,82 +133,45 @@ def patient_dashboard():
     # Sidebar navigation
     menu = ["New Consultation", "Re-consultation", "Consultation History"]
     choice = st.sidebar.selectbox("Navigation", menu)
+    profile_view(f"patient: {choice}")
+    live_updates(user_id, "patient")
     
     consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
     
     if choice == "New Consultation":
         st.header("🆕 First-time Consultation")
         
-        with st.form("new_consultation"):
-            st.subheader("Personal Information")
-            age = st.number_input("Age", min_value=1, max_value=120)
-            gender = st.selectbox("Gender", ["Male", "Female", "Other"])
-            allergies = st.text_area("Allergies (comma separated)")
-            medical_history = st.text_area("Medical History")
-            
-            st.subheader("Medical Information")
-            symptoms = st.text_area("Current Symptoms", placeholder="Describe your symptoms in detail...")
-            
-            st.subheader("Select Specialist")
-            specialization = st.selectbox("Specialization", SPECIALIZATIONS)
-            
-            # Get doctors by specialization
-            doctors = get_doctors_by_specialization(specialization)
-            doctor_options = {f"{doc['name']} ({doc['specialization']})": doc["_id"] for doc in doctors}
-            
-            if doctor_options:
-                selected_doctor = st.selectbox("Available Doctors", list(doctor_options.keys()))
-                doctor_id = doctor_options[selected_doctor]
-            else:
-                st.warning("No doctors available for this specialization")
-                doctor_id = None
-            
-            st.subheader("Upload Lab Reports (Optional)")
-            uploaded_files = st.file_uploader("Upload lab reports", accept_multiple_files=True, 
-                                            type=['pdf', 'jpg', 'jpeg', 'png'])
-            
-            submitted = st.form_submit_button("Submit Consultation Request")
-            
-            if submitted and doctor_id:
-                consultation_data = Consultation(
-                    patient_id=user_id,
-                    doctor_id=doctor_id,
-                    symptoms=symptoms,
-                    medical_history=medical_history.split(',') if medical_history else [],
-                    allergies=allergies.split(',') if allergies else [],
-                    status="pending"
-                )
-                
-                result = consultations_collection.insert_one(consultation_data.to_dict())
-                
-                if result.inserted_id:
-                    st.success("Consultation request submitted successfully!")
-                else:
-                    st.error("Failed to submit consultation request")
+        new_consultation_form(user_id)
     
     elif choice == "Re-consultation":
         st.header("🔄 Re-consultation")
         
-        # Get patient's previous consultations
-        previous_consultations = list(consultations_collection.find(
-            {"patient_id": user_id}
-        ).sort("created_at", -1))
+        # Most recent consultations first; older ones are loaded on request
+        limit_key = f"re_consultation_limit_{user_id}"
+        option_limit = st.session_state.setdefault(limit_key, DEFAULT_PAGE_SIZE)
+        previous_consultations, next_cursor = find_page(
+            consultations_collection, {"patient_id": user_id}, CONSULTATION_OPTION, page_size=option_limit
+        )
+        previous_consultations = attach_users(previous_consultations, "doctor_id", "doctor", USER_NAME)
         
         if not previous_consultations:
             st.info("No previous consultations found. Please start with a new consultation.")
             return
         
+        if next_cursor is not None and st.button("Show older consultations"):
+            st.session_state[limit_key] = option_limit + DEFAULT_PAGE_SIZE
+            st.rerun()
+        
         consultation_options = {}
         for consult in previous_consultations:
-            doctor = get_user_by_id(consult["doctor_id"])
-            doctor_name = doctor["name"] if doctor else "Unknown Doctor"
+            doctor_name = consult["doctor"]["name"] if consult["doctor"] else "Unknown Doctor"
             label = f"Consultation with Dr. {doctor_name} - {consult['created_at'].strftime('%Y-%m-%d')}"
             consultation_options[label] = consult["_id"]
         
         selected_consultation_label = st.selectbox("Select Previous Consultation", list(consultation_options.keys()))
         consultation_id = consultation_options[selected_consultation_label]
         
-        selected_consultation = consultations_collection.find_one({"_id": consultation_id})
+        selected_consultation = consultations_collection.find_one({"_id": consultation_id}, CONSULTATION_FOLLOW_UP)
         
         if selected_consultation:
             st.subheader("Previous Consultation Details")
@@ -102,49 +179,24 @@ def patient_dashboard():
             st.write(f"**Diagnosis:** {selected_consultation.get('diagnosis', 'Not provided')}")
             st.write(f"**Status:** {selected_consultation['status']}")
             
-            with st.form("re_consultation"):
-                st.subheader("New Information")
-                new_symptoms = st.text_area("New Symptoms or Updates")
-                
-                st.subheader("Upload New Lab Reports")
-                new_uploads = st.file_uploader("Upload new lab reports", accept_multiple_files=True,
-                                             type=['pdf', 'jpg', 'jpeg', 'png'])
-                
-                submitted = st.form_submit_button("Submit Re-consultation")
-                
-                if submitted:
-                    # Create new consultation referencing the previous one
-                    new_consultation = Consultation(
-                        patient_id=user_id,
-                        doctor_id=selected_consultation["doctor_id"],
-                        symptoms=f"Follow-up: {selected_consultation['symptoms']}\nNew: {new_symptoms}",
-                        medical_history=selected_consultation.get("medical_history", []),
-                        allergies=selected_consultation.get("allergies", []),
-                        status="pending"
-                    )
-                    
-                    result = consultations_collection.insert_one(new_consultation.to_dict())
-                    
-                    if result.inserted_id:
-                        st.success("Re-consultation request submitted successfully!")
-                    else:
-                        st.error("Failed to submit re-consultation request")
+            re_consultation_form(user_id, selected_consultation)
     
     elif choice == "Consultation History":
         st.header("📋 Consultation History")
         
-        consultations = list(consultations_collection.find(
-            {"patient_id": user_id}
-        ).sort("created_at", -1))
+        consultations = attach_users(paginated(
+            f"consultation_history_{user_id}",
+            partial(find_page, consultations_collection, {"patient_id": user_id}, CONSULTATION_PATIENT_HISTORY)
+        ), "doctor_id", "doctor")
         
         if not consultations:
             st.info("No consultation history found.")
             return
         
         for consult in consultations:
-            doctor = get_user_by_id(consult["doctor_id"])
+            doctor = consult["doctor"]
             doctor_name = doctor["name"] if doctor else "Unknown Doctor"
-            specialization = doctor["specialization"] if doctor else "N/A"
+            specialization = doctor.get("specialization", "N/A") if doctor else "N/A"
             
             with st.expander(f"Consultation with Dr. {doctor_name} ({specialization}) - {consult['created_at'].strftime('%Y-%m-%d %H:%M')}"):
                 col1, col2 = st.columns(2)
@@ -159,6 +211,9 @@ def patient_dashboard():
                     st.write(f"**Prescription:** {consult.get('prescription', 'Not provided')}")
                     st.write(f"**Consultation Notes:** {consult.get('consultation_notes', 'Not provided')}")
                 
+                if consult.get('lab_reports'):
+                    st.write(f"**Lab Reports:** {len(consult['lab_reports'])} file(s) attached")
+                
                 if consult.get('lab_requests'):
                     st.write("**Lab Requests:**")
                     for lab_req in consult['lab_requests']:
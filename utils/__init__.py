@@ -1,21 +1,24 @@
 # utils/__init__.py
-import bcrypt
 import streamlit as st
+from datetime import datetime
 from database.connection import db
-from config import USERS_COLLECTION
+from config import USERS_COLLECTION, CONSULTATIONS_COLLECTION, DOCTOR_CACHE_TTL_SECONDS, DOCTOR_CACHE_MAX_ENTRIES
 from bson import ObjectId
+from utils.pagination import find_page, DEFAULT_PAGE_SIZE
+from utils.projections import USER_EXISTS, USER_AUTH, USER_PUBLIC, USER_SUMMARY, USER_LIST_ROW, DOCTOR_CARD
+from utils.cache import TTLCache
+from utils.passwords import hash_password, verify_password, needs_rehash
+from utils.stats import record_user_registered, record_consultation_created, record_status_change
+from utils.assignment import assign_doctor, record_pending_added, record_pending_removed
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+# Doctor directory keyed by specialization (None = all doctors), shared by every session
+doctor_directory = TTLCache(max_entries=DOCTOR_CACHE_MAX_ENTRIES, ttl_seconds=DOCTOR_CACHE_TTL_SECONDS)
 
 def register_user(name, email, password, user_type, **kwargs):
     users_collection = db.get_collection(USERS_COLLECTION)
     
     # Check if user already exists
-    if users_collection.find_one({"email": email}):
+    if users_collection.find_one({"email": email}, USER_EXISTS):
         return False, "User already exists"
     
     # Create new user
@@ -25,31 +28,125 @@ def register_user(name, email, password, user_type, **kwargs):
         "email": email,
         "password": hashed_password,
         "user_type": user_type,
-        **kwargs
+        **kwargs,
+        "created_at": datetime.utcnow()
     }
+    if user_type == "doctor":
+        # New doctors take auto-assigned requests straight away
+        user_data.setdefault("is_available", True)
+        user_data.setdefault("pending_count", 0)
     
     result = users_collection.insert_one(user_data)
+    record_user_registered(user_type)
+    if user_type == "doctor":
+        invalidate_doctor_directory()
     return True, "User registered successfully"
 
 def authenticate_user(email, password):
     users_collection = db.get_collection(USERS_COLLECTION)
-    user = users_collection.find_one({"email": email})
+    user = users_collection.find_one({"email": email}, USER_AUTH)
     
     if user and verify_password(password, user["password"]):
+        if needs_rehash(user["password"]):
+            # Upgrade to the configured cost while we still have the plaintext
+            users_collection.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": hash_password(password)}}
+            )
         return True, user
     return False, None
 
-def get_user_by_id(user_id):
+def get_user_by_id(user_id, projection=USER_PUBLIC):
     users_collection = db.get_collection(USERS_COLLECTION)
-    return users_collection.find_one({"_id": user_id})
+    return users_collection.find_one({"_id": user_id}, projection)
 
-def get_doctors_by_specialization(specialization=None):
+def _load_doctors(specialization):
     users_collection = db.get_collection(USERS_COLLECTION)
     query = {"user_type": "doctor"}
     if specialization:
         query["specialization"] = specialization
-    return list(users_collection.find(query))
+    # DOCTOR_CARD is a superset of DOCTOR_OPTION, so one cached shape serves both views
+    return list(users_collection.find(query, DOCTOR_CARD))
+
+def get_doctors_by_specialization(specialization=None):
+    """Doctors for a specialization (all doctors if None), served from the directory cache"""
+    return list(doctor_directory.get_or_load(specialization or None, lambda: _load_doctors(specialization)))
+
+def get_all_doctors():
+    return get_doctors_by_specialization(None)
+
+def invalidate_doctor_directory():
+    """Call after any write that adds, removes or changes a doctor"""
+    doctor_directory.invalidate()
+
+def update_doctor_profile(doctor_id, updates):
+    users_collection = db.get_collection(USERS_COLLECTION)
+    result = users_collection.update_one({"_id": doctor_id, "user_type": "doctor"}, {"$set": updates})
+    invalidate_doctor_directory()
+    return result
 
-def get_all_patients():
+def get_users_page(user_type=None, page_size=DEFAULT_PAGE_SIZE, after=None, projection=USER_LIST_ROW):
+    """One keyset page of users (newest first); returns (users, next_cursor)"""
     users_collection = db.get_collection(USERS_COLLECTION)
-    return list(users_collection.find({"user_type": "patient"}))
\ No newline at end of file
+    query = {"user_type": user_type} if user_type else {}
+    return find_page(users_collection, query, projection, page_size, after)
+
+def get_doctors_page(page_size=DEFAULT_PAGE_SIZE, after=None):
+    return get_users_page("doctor", page_size, after, DOCTOR_CARD)
+
+def get_users_by_ids(user_ids, projection=USER_SUMMARY):
+    """Resolve many users with a single $in query, returned as {_id: user}"""
+    unique_ids = list({user_id for user_id in user_ids if user_id is not None})
+    if not unique_ids:
+        return {}
+    users_collection = db.get_collection(USERS_COLLECTION)
+    return {user["_id"]: user for user in users_collection.find({"_id": {"$in": unique_ids}}, projection)}
+
+def attach_users(consultations, id_field, as_field, projection=USER_SUMMARY):
+    """Join each consultation with its user (e.g. patient_id -> patient) in one round trip"""
+    consultations = list(consultations)
+    users = get_users_by_ids([consult.get(id_field) for consult in consultations], projection)
+    for consult in consultations:
+        consult[as_field] = users.get(consult.get(id_field))
+    return consultations
+
+
+def create_consultation(consultation_data, reserved=False):
+    """Insert a consultation; reserved means assign_doctor already counted it against the doctor"""
+    consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+    status = consultation_data.get("status", "pending")
+    try:
+        result = consultations_collection.insert_one(consultation_data)
+    except Exception:
+        if reserved:
+            record_pending_removed(consultation_data["doctor_id"])
+        raise
+    record_consultation_created(status)
+    if status == "pending" and not reserved:
+        record_pending_added(consultation_data["doctor_id"])
+    return result
+
+def create_auto_assigned_consultation(consultation_data, specialization):
+    """Route to the least-loaded available doctor; returns (result, doctor) or (None, None)"""
+    doctor = assign_doctor(specialization)
+    if doctor is None:
+        return None, None
+    consultation_data.update({"doctor_id": doctor["_id"], "assigned_by": "auto"})
+    return create_consultation(consultation_data, reserved=True), doctor
+
+def update_consultation(consultation_id, current_status, update_data):
+    """Apply update_data only if the consultation is still in current_status; returns True if applied"""
+    consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+    # The pre-image tells us which doctor's pending counter to release
+    previous = consultations_collection.find_one_and_update(
+        {"_id": consultation_id, "status": current_status},
+        {"$set": update_data},
+        projection={"doctor_id": 1}
+    )
+    if previous is None:
+        return False
+    new_status = update_data.get("status", current_status)
+    record_status_change(current_status, new_status)
+    if current_status == "pending" and new_status != "pending":
+        record_pending_removed(previous["doctor_id"])
+    return True
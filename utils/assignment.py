@@ -0,0 +1,50 @@
+# utils/assignment.py
+"""
+Load-aware doctor assignment.
+
+Every doctor document carries pending_count, the number of their consultations
+still in "pending". It is kept current with $inc (+1 when a consultation is
+created, -1 when it leaves pending), so picking the least-loaded available
+doctor is a single find_one_and_update on the
+(user_type, specialization, is_available, pending_count) index that also
+reserves the slot - no per-request count query, and concurrent submissions
+spread across doctors instead of piling onto the same one.
+"""
+from pymongo import ReturnDocument, UpdateOne
+from database.connection import db
+from config import USERS_COLLECTION, CONSULTATIONS_COLLECTION
+from utils.projections import DOCTOR_OPTION
+
+def assign_doctor(specialization, database=db):
+    """Reserve the least-loaded available doctor (their counter is already incremented) or None"""
+    return database.get_collection(USERS_COLLECTION).find_one_and_update(
+        {"user_type": "doctor", "specialization": specialization, "is_available": True},
+        {"$inc": {"pending_count": 1}},
+        sort=[("pending_count", 1), ("_id", 1)],
+        projection={**DOCTOR_OPTION, "pending_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+def record_pending_added(doctor_id, database=db):
+    database.get_collection(USERS_COLLECTION).update_one({"_id": doctor_id}, {"$inc": {"pending_count": 1}})
+
+def record_pending_removed(doctor_id, database=db):
+    # Never go negative, e.g. for consultations created before counters existed
+    database.get_collection(USERS_COLLECTION).update_one(
+        {"_id": doctor_id, "pending_count": {"$gt": 0}}, {"$inc": {"pending_count": -1}}
+    )
+
+def rebuild_doctor_loads(database=db):
+    """Recompute every doctor's pending_count from the consultations (repairs any drift)"""
+    users_collection = database.get_collection(USERS_COLLECTION)
+    pending = {row["_id"]: row["count"] for row in database.get_collection(CONSULTATIONS_COLLECTION).aggregate([
+        {"$match": {"status": "pending"}},
+        {"$group": {"_id": "$doctor_id", "count": {"$sum": 1}}}
+    ])}
+    users_collection.update_many({"user_type": "doctor"}, {"$set": {"pending_count": 0}})
+    if pending:
+        users_collection.bulk_write([
+            UpdateOne({"_id": doctor_id, "user_type": "doctor"}, {"$set": {"pending_count": count}})
+            for doctor_id, count in pending.items()
+        ], ordered=False)
+    return pending
@@ -0,0 +1,178 @@
+# utils/lab_reports.py
+"""
+Lab report uploads, streamed in chunks into a content-addressed blob store.
+
+Files are hashed with SHA-256 first; a blob is only written when no blob with
+that hash exists, so re-uploading the same report costs neither RAM nor disk
+twice. Every upload still gets its own LabReport document.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+from datetime import datetime
+import gridfs
+from pymongo.errors import DuplicateKeyError
+from database.connection import db
+from config import (
+    LAB_REPORTS_COLLECTION, CONSULTATIONS_COLLECTION, LAB_REPORT_STORE,
+    LAB_REPORT_BUCKET, LAB_REPORT_DIR, LAB_REPORT_CHUNK_SIZE
+)
+from models import LabReport
+from utils.projections import LAB_REPORT_SUMMARY
+from utils.previews import schedule_preview
+
+def _chunks(stream, chunk_size=LAB_REPORT_CHUNK_SIZE):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def sha256_of(stream):
+    """Hash a seekable stream chunk by chunk and rewind it; returns (hex digest, size)"""
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    for chunk in _chunks(stream):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+# =============================================
+# BLOB STORES
+# =============================================
+
+class GridFSBlobStore:
+    """Blobs in a GridFS bucket; metadata.sha256 is uniquely indexed"""
+
+    def __init__(self, database=db, bucket_name=LAB_REPORT_BUCKET):
+        self.bucket = gridfs.GridFSBucket(database, bucket_name=bucket_name, chunk_size_bytes=LAB_REPORT_CHUNK_SIZE)
+        self.files = database[f"{bucket_name}.files"]
+        self.chunks = database[f"{bucket_name}.chunks"]
+
+    def find(self, sha256):
+        blob = self.files.find_one({"metadata.sha256": sha256}, {"_id": 1})
+        return blob["_id"] if blob else None
+
+    def put(self, sha256, stream, filename, content_type):
+        existing = self.find(sha256)
+        if existing is not None:
+            return existing, False
+        grid_in = self.bucket.open_upload_stream(
+            filename, metadata={"sha256": sha256, "content_type": content_type}
+        )
+        try:
+            for chunk in _chunks(stream):
+                grid_in.write(chunk)
+            grid_in.close()
+        except (DuplicateKeyError, gridfs.errors.FileExists):
+            # Same content uploaded concurrently; the unique index kept the first copy
+            self.chunks.delete_many({"files_id": grid_in._id})
+            return self.find(sha256), False
+        except BaseException:
+            grid_in.abort()
+            raise
+        return grid_in._id, True
+
+    def open(self, blob_id):
+        return self.bucket.open_download_stream(blob_id)
+
+class LocalBlobStore:
+    """Blobs as files named by their hash (sharded by the first two hex digits)"""
+
+    def __init__(self, root=LAB_REPORT_DIR):
+        self.root = root
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def find(self, sha256):
+        return sha256 if os.path.exists(self.path(sha256)) else None
+
+    def put(self, sha256, stream, filename, content_type):
+        path = self.path(sha256)
+        if os.path.exists(path):
+            return sha256, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in _chunks(stream):
+                    out.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return sha256, True
+
+    def open(self, blob_id):
+        return open(self.path(blob_id), "rb")
+
+def get_blob_store():
+    if LAB_REPORT_STORE == "local":
+        return LocalBlobStore()
+    return GridFSBlobStore()
+
+blob_store = get_blob_store()
+
+# =============================================
+# LAB REPORTS
+# =============================================
+
+def _report_type(filename, content_type):
+    content_type = content_type or mimetypes.guess_type(filename)[0] or ""
+    if content_type == "application/pdf":
+        return "pdf"
+    if content_type.startswith("image/"):
+        return "image"
+    return "other"
+
+def save_lab_report(uploaded_file, consultation_id, patient_id, doctor_id, notes=None):
+    """Store one uploaded file (deduplicated) and link a LabReport to the consultation"""
+    filename = getattr(uploaded_file, "name", "report")
+    content_type = getattr(uploaded_file, "type", None) or mimetypes.guess_type(filename)[0]
+
+    sha256, size = sha256_of(uploaded_file)
+    blob_id, stored = blob_store.put(sha256, uploaded_file, filename, content_type)
+
+    report = LabReport(
+        consultation_id=consultation_id,
+        patient_id=patient_id,
+        doctor_id=doctor_id,
+        report_type=_report_type(filename, content_type),
+        report_data={
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256,
+            "store": LAB_REPORT_STORE,
+            "blob_id": blob_id,
+            "deduplicated": not stored,
+        },
+        file_path=blob_store.path(sha256) if isinstance(blob_store, LocalBlobStore) else None,
+        notes=notes
+    )
+    report_data = report.to_dict()
+    result = db.get_collection(LAB_REPORTS_COLLECTION).insert_one(report_data)
+    db.get_collection(CONSULTATIONS_COLLECTION).update_one(
+        {"_id": consultation_id},
+        # Bump updated_at so queue syncs and incremental exports pick up the new report
+        {"$push": {"lab_reports": result.inserted_id}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+    schedule_preview(report_data)
+    return result.inserted_id
+
+def save_lab_reports(uploaded_files, consultation_id, patient_id, doctor_id):
+    return [save_lab_report(uploaded_file, consultation_id, patient_id, doctor_id)
+            for uploaded_file in uploaded_files or []]
+
+def get_lab_reports(consultation_id):
+    return list(db.get_collection(LAB_REPORTS_COLLECTION).find(
+        {"consultation_id": consultation_id}, LAB_REPORT_SUMMARY
+    ).sort("created_at", 1))
+
+def open_lab_report(report):
+    """Readable binary stream for a LabReport document"""
+    return blob_store.open(report["report_data"]["blob_id"])
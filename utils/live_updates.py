@@ -0,0 +1,207 @@
+# utils/live_updates.py
+"""
+Live consultation updates for open sessions.
+
+One background watcher per process follows the consultations collection, using
+a change stream when MongoDB runs as a replica set and polling the
+(updated_at, _id) index otherwise, and drops each changed consultation into the
+mailboxes of the sessions subscribed as its doctor or patient. A small
+fragment in each dashboard drains the session's mailbox: it applies the changes
+to the doctor's pending queue in memory and raises toasts, so nobody has to
+click around to see new requests. The doctor's queue fragment re-renders the
+merged queue on its own refresh tick, so an event never reruns the page.
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timedelta
+import streamlit as st
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+from database.connection import db
+from database.monitoring import ignore_this_thread
+from config import (
+    CONSULTATIONS_COLLECTION, LIVE_UPDATES, LIVE_POLL_SECONDS, LIVE_CHECK_SECONDS, LIVE_MAILBOX_SIZE,
+    QUEUE_SYNC_OVERLAP_SECONDS
+)
+from utils.profiling import fragment_view
+from utils.projections import CONSULTATION_QUEUE_SYNC
+from utils.queue_sync import get_pending_queue
+
+logger = logging.getLogger(__name__)
+
+# Fields delivered with every event (enough to update a doctor's pending queue)
+EVENT_FIELDS = CONSULTATION_QUEUE_SYNC
+
+class Mailbox:
+    """Bounded per-session inbox of changed consultations"""
+
+    def __init__(self, watcher, user_id, size=LIVE_MAILBOX_SIZE):
+        self.watcher = watcher
+        self.user_id = user_id
+        self._events = deque(maxlen=size)
+
+    def put(self, consult):
+        self._events.append(consult)
+
+    def drain(self):
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+class ConsultationWatcher:
+    """Background thread publishing consultation changes to subscribed sessions"""
+
+    def __init__(self, collection, mode=LIVE_UPDATES, poll_seconds=LIVE_POLL_SECONDS):
+        self.collection = collection
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self.source = None
+        # Mailboxes vanish with their session state
+        self._subscribers = defaultdict(weakref.WeakSet)
+        self._lock = threading.Lock()
+        self._resume_token = None
+        self._thread = threading.Thread(target=self._run, name="consultation-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def subscribe(self, user_id):
+        mailbox = Mailbox(self, user_id)
+        with self._lock:
+            self._subscribers[user_id].add(mailbox)
+        return mailbox
+
+    def publish(self, consult):
+        with self._lock:
+            mailboxes = [mailbox
+                         for user_id in {consult.get("doctor_id"), consult.get("patient_id")}
+                         for mailbox in self._subscribers.get(user_id, ())]
+        for mailbox in mailboxes:
+            mailbox.put(consult)
+
+    # ---- sources ----
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        # Keep the watcher's steady getMore / poll traffic out of the per-view command log
+        ignore_this_thread()
+        if self.mode in ("auto", "changestream"):
+            try:
+                self._watch_change_stream()
+            except Exception:
+                # Standalone servers reject $changeStream; polling works everywhere
+                logger.warning("Change streams unavailable; polling every %gs", self.poll_seconds, exc_info=True)
+        self._poll()
+
+    def _watch_change_stream(self):
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {"operationType": 1, "fullDocument._id": 1,
+                          **{f"fullDocument.{field}": 1 for field in EVENT_FIELDS}}},
+        ]
+        while True:
+            try:
+                with self.collection.watch(pipeline, full_document="updateLookup",
+                                           resume_after=self._resume_token, max_await_time_ms=1000) as stream:
+                    self.source = "change stream"
+                    for change in stream:
+                        self._resume_token = stream.resume_token
+                        if change.get("fullDocument"):
+                            self.publish(change["fullDocument"])
+            except OperationFailure as exc:
+                if self.source is None:
+                    raise
+                logger.warning("Change stream interrupted (%s); resuming", exc)
+                time.sleep(self.poll_seconds)
+            except PyMongoError as exc:
+                logger.warning("Change stream interrupted (%s); resuming", exc)
+                time.sleep(self.poll_seconds)
+
+    def _poll(self):
+        self.source = "polling"
+        # updated_at is stamped by the writing app server, so each poll looks back a
+        # little and skips (_id, updated_at) pairs it has already published
+        watermark = datetime.utcnow()
+        published = OrderedDict()
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                since = watermark - timedelta(seconds=QUEUE_SYNC_OVERLAP_SECONDS)
+                polled_at = datetime.utcnow()
+                changed = self.collection.find({"updated_at": {"$gte": since}}, EVENT_FIELDS).sort(
+                    [("updated_at", ASCENDING), ("_id", ASCENDING)]
+                )
+                for consult in changed:
+                    key = (consult["_id"], consult["updated_at"])
+                    if key in published:
+                        continue
+                    published[key] = True
+                    self.publish(consult)
+                watermark = polled_at
+                while published and next(iter(published))[1] < since:
+                    published.popitem(last=False)
+            except Exception:
+                # Never let one bad poll end live updates for the whole process
+                logger.exception("Consultation polling failed; retrying")
+
+@st.cache_resource(show_spinner=False)
+def get_watcher():
+    """The process-wide watcher, or None when LIVE_UPDATES=off"""
+    if LIVE_UPDATES == "off":
+        return None
+    return ConsultationWatcher(db.get_collection(CONSULTATIONS_COLLECTION)).start()
+
+def get_mailbox(user_id):
+    """This session's mailbox, resubscribed when the logged-in user changes"""
+    watcher = get_watcher()
+    if watcher is None:
+        return None
+    if not watcher.is_alive():
+        logger.error("Consultation watcher stopped; starting a new one")
+        get_watcher.clear()
+        watcher = get_watcher()
+    mailbox = st.session_state.get("live_mailbox")
+    if mailbox is None or mailbox.user_id != user_id or mailbox.watcher is not watcher:
+        mailbox = watcher.subscribe(user_id)
+        st.session_state.live_mailbox = mailbox
+    return mailbox
+
+# =============================================
+# SESSION SIDE
+# =============================================
+
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+@fragment_view("live updates")
+def live_updates(user_id, user_type):
+    """Drain this session's mailbox into the pending queue and raise toasts"""
+    mailbox = get_mailbox(user_id)
+    if mailbox is None:
+        return
+    # Consultations this session just answered are already reflected on the page
+    answered = st.session_state.get("answered_consultations", {})
+    changed = [consult for consult in mailbox.drain() if consult["_id"] not in answered]
+    if not changed:
+        return
+    
+    if user_type == "doctor":
+        queue = get_pending_queue(user_id)
+        if queue.synced_at is None:
+            return  # the queue's first sync picks everything up
+        # Merged in memory; the queue fragment shows it on its next refresh tick
+        added = queue.apply(changed)
+        for consult in queue.items():
+            if consult["_id"] in added:
+                patient_name = (consult["patient"] or {}).get("name", "a patient")
+                st.toast(f"🆕 New consultation request from {patient_name}")
+    else:
+        for consult in changed:
+            if consult["status"] != "pending":
+                st.toast(f"📋 Your consultation from {consult['created_at'].strftime('%Y-%m-%d')} "
+                         f"is now {consult['status'].replace('_', ' ')}")
@@ -0,0 +1,68 @@
+# utils/pagination.py
+import streamlit as st
+from pymongo import DESCENDING
+
+# Keyset order for every paginated list: newest first, _id breaks ties
+NEWEST_FIRST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+PAGE_SIZES = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
+
+def keyset_filter(query, after=None):
+    """Restrict query to documents that sort after the (created_at, _id) cursor"""
+    if not after:
+        return query
+    created_at, last_id = after
+    return {"$and": [query, {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}}
+    ]}]}
+
+def find_page(collection, query, projection=None, page_size=DEFAULT_PAGE_SIZE, after=None):
+    """Return (docs, next_cursor); next_cursor is None on the last page"""
+    if projection and any(value for key, value in projection.items() if key != "_id"):
+        # Inclusion projection - the cursor needs created_at
+        projection = {**projection, "created_at": 1}
+
+    cursor = collection.find(keyset_filter(query, after), projection)
+    docs = list(cursor.sort(NEWEST_FIRST).limit(page_size + 1))
+
+    if len(docs) <= page_size:
+        return docs, None
+    docs = docs[:page_size]
+    return docs, (docs[-1]["created_at"], docs[-1]["_id"])
+
+def paginated(key, fetch_page, default_page_size=DEFAULT_PAGE_SIZE):
+    """
+    Render page-size and previous/next controls and return the current page.
+
+    fetch_page(page_size=..., after=...) must return (docs, next_cursor), e.g. a
+    functools.partial over find_page. Visited cursors live in session_state so
+    "previous" never re-queries from the start.
+    """
+    state_key = f"pagination_{key}"
+    state = st.session_state.setdefault(state_key, {"cursors": [None], "page_size": default_page_size})
+
+    page_size = st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(state["page_size"]),
+                             key=f"{state_key}_size")
+    if page_size != state["page_size"]:
+        state["page_size"] = page_size
+        state["cursors"] = [None]
+
+    docs, next_cursor = fetch_page(page_size=page_size, after=state["cursors"][-1])
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ Previous", key=f"{state_key}_prev", disabled=len(state["cursors"]) == 1):
+            state["cursors"].pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(state['cursors'])}")
+    with col3:
+        if st.button("Next ▶", key=f"{state_key}_next", disabled=next_cursor is None):
+            state["cursors"].append(next_cursor)
+            st.rerun()
+
+    return docs
+
+def reset_pagination(key):
+    st.session_state.pop(f"pagination_{key}", None)
@@ -0,0 +1,37 @@
+# utils/passwords.py
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+
+# bcrypt releases the GIL, so a small bounded pool keeps hashing bursts from
+# starving the Streamlit script threads while capping CPU used for hashing
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _verify(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def hash_password_async(password, rounds=None):
+    """Submit hashing to the worker pool and return the Future"""
+    return _executor.submit(_hash, password, rounds or BCRYPT_ROUNDS)
+
+def verify_password_async(password, hashed):
+    return _executor.submit(_verify, password, hashed)
+
+def hash_password(password, rounds=None):
+    return hash_password_async(password, rounds).result()
+
+def verify_password(password, hashed):
+    return verify_password_async(password, hashed).result()
+
+def hash_rounds(hashed):
+    """Cost factor stored in a bcrypt hash ("$2b$12$..." -> 12)"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed, rounds=None):
+    return hash_rounds(hashed) != (rounds or BCRYPT_ROUNDS)
@@ -0,0 +1,131 @@
+# utils/previews.py
+"""
+Downscaled previews for lab reports, generated on a worker pool at upload time
+and stored once per content hash (so a re-uploaded report reuses its preview).
+
+PDF first-page rendering uses PyMuPDF (in requirements.txt); if it is missing,
+PDFs simply have no preview and are still downloadable from the dashboard.
+
+    python -m utils.previews --backfill    # generate previews for older reports
+"""
+import argparse
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson import Binary
+from PIL import Image
+from database.connection import db
+from config import (
+    LAB_REPORTS_COLLECTION, LAB_REPORT_PREVIEWS_COLLECTION,
+    PREVIEW_MAX_SIZE, PREVIEW_WORKERS, PREVIEW_CACHE_ENTRIES
+)
+from utils.cache import TTLCache
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="preview")
+
+# sha256 -> preview document; previews never change, so the TTL only bounds memory churn
+_preview_cache = TTLCache(max_entries=PREVIEW_CACHE_ENTRIES, ttl_seconds=24 * 3600)
+
+def _render_image(stream):
+    image = Image.open(stream)
+    image.thumbnail((PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
+    return image
+
+def _render_pdf(stream):
+    if fitz is None:
+        return None
+    with fitz.open(stream=stream.read(), filetype="pdf") as document:
+        if not document.page_count:
+            return None
+        page = document[0]
+        zoom = PREVIEW_MAX_SIZE / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+def generate_preview(report):
+    """Render and store the preview for a LabReport document (no-op if it already exists)"""
+    from utils.lab_reports import open_lab_report
+
+    sha256 = report["report_data"]["sha256"]
+    previews_collection = db.get_collection(LAB_REPORT_PREVIEWS_COLLECTION)
+    if previews_collection.find_one({"_id": sha256}, {"_id": 1}):
+        return False
+
+    renderers = {"image": _render_image, "pdf": _render_pdf}
+    renderer = renderers.get(report["report_type"])
+    if renderer is None:
+        return False
+
+    with open_lab_report(report) as stream:
+        image = renderer(stream)
+    if image is None:
+        return False
+
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+    previews_collection.update_one(
+        {"_id": sha256},
+        {"$setOnInsert": {
+            "content_type": "image/jpeg",
+            "data": Binary(output.getvalue()),
+            "width": image.width,
+            "height": image.height,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    return True
+
+def _generate_quietly(report):
+    try:
+        return generate_preview(report)
+    except Exception:
+        # A broken upload must never take the worker pool down
+        logger.exception("Preview generation failed for %s", report["report_data"].get("filename"))
+        return False
+
+def schedule_preview(report):
+    """Queue preview generation in the background; returns the Future"""
+    return _executor.submit(_generate_quietly, report)
+
+def get_preview(sha256):
+    """Preview document for a content hash, or None if not (yet) generated"""
+    preview = _preview_cache.get(sha256)
+    if preview is None:
+        preview = db.get_collection(LAB_REPORT_PREVIEWS_COLLECTION).find_one({"_id": sha256})
+        if preview is not None:
+            # Missing previews are not cached so they show up once generated
+            _preview_cache.set(sha256, preview)
+    return preview
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate lab report previews")
+    parser.add_argument("--backfill", action="store_true", help="generate previews for every stored report")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    reports = db.get_collection(LAB_REPORTS_COLLECTION).find(
+        {"report_type": {"$in": ["image", "pdf"]}}, {"report_type": 1, "report_data": 1}
+    )
+    seen = set()
+    futures = []
+    for report in reports:
+        if report["report_data"]["sha256"] not in seen:
+            seen.add(report["report_data"]["sha256"])
+            futures.append(schedule_preview(report))
+    generated = sum(1 for future in futures if future.result())
+    logger.info("%d preview(s) generated", generated)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# utils/profiling.py
+"""
+Per-section render profiling for the Streamlit dashboards.
+
+Each section records wall time, MongoDB time / commands (from the command
+monitor) and the number of Streamlit elements it emitted (None when this
+Streamlit version does not expose the script's message queue). Sections are opened
+explicitly (profile_section / @profiled) or implicitly by profile_view, which
+also tags database commands with the view and lasts until the next view or the
+end of the enclosing section. A fragment-only rerun skips main(), so fragments
+are wrapped in @fragment_view to start their own monitored rerun.
+"""
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import streamlit as st
+from config import PROFILE_OVERLAY, PROFILE_TRACE_SIZE
+from database.monitoring import begin_rerun, current_rerun_id, db_time, set_view
+
+_state = threading.local()
+# Finished spans from every session in this process
+spans = deque(maxlen=PROFILE_TRACE_SIZE)
+
+def _rerun_state():
+    rerun_id = current_rerun_id()
+    if getattr(_state, "rerun_id", None) != rerun_id:
+        _state.rerun_id = rerun_id
+        _state.stack = []
+        _state.spans = []
+        # None = elements cannot be counted; spans still carry timings
+        _state.elements = 0 if _install_element_counter() else None
+    return _state
+
+def _install_element_counter():
+    """Count delta messages (elements) enqueued by this session's script thread; False if unsupported"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        return False
+    # _enqueue is private ScriptRunContext API; without it fall back to timing only
+    if ctx is None or not hasattr(ctx, "_enqueue"):
+        return False
+    if getattr(ctx, "_profiling_counter", False):
+        return True
+    enqueue = ctx._enqueue
+
+    def counting_enqueue(msg):
+        if msg.WhichOneof("type") == "delta" and getattr(_state, "elements", None) is not None:
+            _state.elements += 1
+        return enqueue(msg)
+
+    ctx._enqueue = counting_enqueue
+    ctx._profiling_counter = True
+    return True
+
+def _start(name, implicit=False):
+    state = _rerun_state()
+    db_ms, db_calls = db_time()
+    state.stack.append({
+        "name": name,
+        "order": len(state.spans) + len(state.stack),
+        "implicit": implicit,
+        "started": time.perf_counter(),
+        "db_ms": db_ms,
+        "db_calls": db_calls,
+        "elements": state.elements,
+    })
+
+def _finish():
+    state = _rerun_state()
+    opened = state.stack.pop()
+    db_ms, db_calls = db_time()
+    span = {
+        "rerun_id": state.rerun_id,
+        "name": opened["name"],
+        "order": opened["order"],
+        "parent": state.stack[-1]["name"] if state.stack else None,
+        "depth": len(state.stack),
+        "wall_ms": (time.perf_counter() - opened["started"]) * 1000,
+        "db_ms": db_ms - opened["db_ms"],
+        "db_calls": db_calls - opened["db_calls"],
+        "elements": None if opened["elements"] is None or state.elements is None
+                    else state.elements - opened["elements"],
+        "at": datetime.utcnow().isoformat(),
+    }
+    state.spans.append(span)
+    spans.append(span)
+
+def _close_implicit():
+    state = _rerun_state()
+    while state.stack and state.stack[-1]["implicit"]:
+        _finish()
+
+@contextmanager
+def profile_section(name):
+    _start(name)
+    depth = len(_state.stack)
+    try:
+        yield
+    finally:
+        # Close implicit view sections opened inside this one, then this one
+        while len(_state.stack) > depth:
+            _finish()
+        _finish()
+
+def profiled(name=None):
+    """Decorator form of profile_section"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def profile_view(view):
+    """Tag database commands with view and profile until the next view / section end"""
+    set_view(view)
+    _close_implicit()
+    _start(view, implicit=True)
+
+def _fragment_only_run():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and getattr(ctx, "fragment_ids_this_run", None))
+
+def fragment_view(view):
+    """
+    Decorator for st.fragment functions (apply beneath @st.fragment).
+
+    In a fragment-only rerun the outermost fragment starts a new monitored rerun
+    tagged view and profiles itself; inside a full run the fragment belongs to
+    the surrounding view like any other code.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_state, "in_fragment", False) or not _fragment_only_run():
+                return func(*args, **kwargs)
+            _state.in_fragment = True
+            try:
+                begin_rerun(view)
+                with profile_section(view):
+                    return func(*args, **kwargs)
+            finally:
+                _state.in_fragment = False
+        return wrapper
+    return decorator
+
+# =============================================
+# REPORTING
+# =============================================
+
+def current_trace():
+    return list(_rerun_state().spans)
+
+def export_traces(path=None):
+    """All recorded spans as JSON (written to path when given)"""
+    trace = json.dumps(list(spans), indent=2)
+    if path:
+        with open(path, "w") as out:
+            out.write(trace)
+    return trace
+
+def show_profile_overlay():
+    """Sidebar debug overlay for this rerun (enabled with PROFILE_OVERLAY=true)"""
+    if not PROFILE_OVERLAY:
+        return
+    trace = current_trace()
+    if not trace:
+        return
+    with st.sidebar.expander("⏱️ Render Profile", expanded=False):
+        for span in sorted(trace, key=lambda span: span["order"]):
+            indent = " " * span["depth"]
+            elements = "" if span["elements"] is None else f", {span['elements']} elements"
+            st.caption(f"{indent}**{span['name']}** - {span['wall_ms']:.0f} ms total, "
+                       f"{span['db_ms']:.0f} ms DB ({span['db_calls']} calls){elements}")
+        st.download_button("Download JSON trace", export_traces(), file_name="render_profile.json",
+                           mime="application/json")
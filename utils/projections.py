@@ -0,0 +1,54 @@
+# utils/projections.py
+"""
+Named query shapes: the projection each view reads.
+
+Keep these in sync with what the view renders - anything not listed here
+(password hashes, notes, history arrays, ...) never leaves the server.
+"""
+
+# ---- users ----
+USER_EXISTS = {"_id": 1}
+USER_AUTH = {"name": 1, "user_type": 1, "password": 1}
+USER_PUBLIC = {"password": 0}
+USER_NAME = {"name": 1}
+USER_SUMMARY = {"name": 1, "email": 1, "user_type": 1, "age": 1, "gender": 1, "specialization": 1}
+# Covered by the optional (created_at, _id, user_type, name, email) index
+USER_LIST_ROW = {"name": 1, "email": 1, "user_type": 1, "created_at": 1}
+DOCTOR_OPTION = {"name": 1, "specialization": 1, "consultation_fee": 1}
+DOCTOR_CARD = {
+    "name": 1, "specialization": 1, "qualifications": 1, "consultation_fee": 1,
+    "available_hours": 1, "is_available": 1, "created_at": 1
+}
+
+# ---- consultations ----
+CONSULTATION_QUEUE = {
+    "patient_id": 1, "status": 1, "symptoms": 1, "allergies": 1, "medical_history": 1,
+    "lab_reports": 1, "created_at": 1
+}
+# Delta sync also needs the fields that decide whether a document stays in the queue
+CONSULTATION_QUEUE_SYNC = {**CONSULTATION_QUEUE, "doctor_id": 1, "updated_at": 1}
+CONSULTATION_DOCTOR_HISTORY = {
+    "patient_id": 1, "status": 1, "symptoms": 1, "diagnosis": 1, "created_at": 1
+}
+CONSULTATION_PATIENT_HISTORY = {
+    "doctor_id": 1, "doctor_name": 1, "status": 1, "symptoms": 1, "allergies": 1, "diagnosis": 1,
+    "prescription": 1, "consultation_notes": 1, "lab_requests": 1, "lab_reports": 1, "created_at": 1
+}
+CONSULTATION_FOLLOW_UP = {
+    "doctor_id": 1, "status": 1, "symptoms": 1, "diagnosis": 1, "allergies": 1, "medical_history": 1
+}
+CONSULTATION_SEARCH_RESULT = {
+    "patient_id": 1, "doctor_id": 1, "status": 1, "symptoms": 1, "diagnosis": 1,
+    "prescription": 1, "consultation_notes": 1, "created_at": 1
+}
+CONSULTATION_OPTION = {"doctor_id": 1, "created_at": 1}
+CONSULTATION_EXPORT = {
+    "patient_id": 1, "doctor_id": 1, "doctor_name": 1, "doctor_specialization": 1, "status": 1,
+    "symptoms": 1, "diagnosis": 1, "prescription": 1, "consultation_fee": 1,
+    "created_at": 1, "updated_at": 1
+}
+# Covered by the optional (doctor_id, created_at, _id, status, patient_id) index
+CONSULTATION_ROW = {"patient_id": 1, "status": 1, "created_at": 1}
+
+# ---- lab reports ----
+LAB_REPORT_SUMMARY = {"report_type": 1, "report_data": 1, "created_at": 1}
@@ -0,0 +1,78 @@
+# utils/queue_sync.py
+"""
+Session-level copy of a doctor's pending consultation queue kept current with
+delta syncs: after the first load only consultations whose updated_at is past
+the last-seen watermark are fetched, merged in, or dropped once they leave the
+pending state.
+"""
+import time
+from datetime import datetime, timedelta
+import streamlit as st
+from database.connection import db
+from config import CONSULTATIONS_COLLECTION, QUEUE_SYNC_OVERLAP_SECONDS, QUEUE_FULL_SYNC_SECONDS
+from utils import attach_users
+from utils.projections import CONSULTATION_QUEUE_SYNC
+
+class PendingQueue:
+    """A doctor's pending consultations, newest first, refreshed incrementally"""
+
+    def __init__(self, doctor_id):
+        self.doctor_id = doctor_id
+        self.consultations = {}
+        self.watermark = None
+        self.synced_at = None
+        self._full_sync_at = 0.0
+
+    def sync(self, full=False):
+        """Merge changes since the last sync; returns the number of documents fetched"""
+        consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+        full = full or self.watermark is None or time.monotonic() - self._full_sync_at > QUEUE_FULL_SYNC_SECONDS
+        # Anything written before this instant is visible to the query below
+        started_at = datetime.utcnow()
+
+        if full:
+            changed = list(consultations_collection.find(
+                {"doctor_id": self.doctor_id, "status": "pending"}, CONSULTATION_QUEUE_SYNC
+            ))
+            self.consultations = {}
+            self._full_sync_at = time.monotonic()
+        else:
+            # updated_at is stamped by the writing app server, so look back a little
+            # to catch writes that landed late; re-merging a document is harmless
+            since = self.watermark - timedelta(seconds=QUEUE_SYNC_OVERLAP_SECONDS)
+            changed = list(consultations_collection.find(
+                {"doctor_id": self.doctor_id, "updated_at": {"$gte": since}}, CONSULTATION_QUEUE_SYNC
+            ))
+
+        self.apply(changed)
+        self.watermark = started_at
+        self.synced_at = datetime.utcnow()
+        return len(changed)
+
+    def apply(self, changed):
+        """Merge changed consultation documents; returns the ids that newly joined the queue"""
+        changed = [consult for consult in changed if consult.get("doctor_id", self.doctor_id) == self.doctor_id]
+        pending = [consult for consult in changed if consult["status"] == "pending"]
+        for consult in changed:
+            if consult["status"] != "pending":
+                self.consultations.pop(consult["_id"], None)
+        added = {consult["_id"] for consult in pending} - self.consultations.keys()
+        # Patient details are only looked up for new or changed consultations
+        for consult in attach_users(pending, "patient_id", "patient"):
+            self.consultations[consult["_id"]] = consult
+        return added
+
+    def items(self):
+        return sorted(self.consultations.values(), key=lambda consult: (consult["created_at"], consult["_id"]),
+                      reverse=True)
+
+    def __len__(self):
+        return len(self.consultations)
+
+def get_pending_queue(doctor_id):
+    """This session's queue for doctor_id (empty until its first sync())"""
+    queue = st.session_state.get("pending_queue")
+    if queue is None or queue.doctor_id != doctor_id:
+        queue = PendingQueue(doctor_id)
+        st.session_state.pending_queue = queue
+    return queue
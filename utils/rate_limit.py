@@ -0,0 +1,82 @@
+# utils/rate_limit.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import streamlit as st
+from pymongo import ReturnDocument
+from database.connection import db
+from config import (
+    LOGIN_ATTEMPTS_COLLECTION, LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE,
+    LOGIN_CLIENT_BURST, LOGIN_CLIENT_PER_MINUTE, LOGIN_RATE_LIMIT_MAX_KEYS,
+    LOGIN_RATE_LIMIT_BACKEND, TRUSTED_PROXY_COUNT
+)
+
+class TokenBucketLimiter:
+    """Per-key token buckets in a bounded LRU (least recently seen keys are dropped)"""
+
+    def __init__(self, capacity, per_minute, max_keys=LOGIN_RATE_LIMIT_MAX_KEYS):
+        self.capacity = capacity
+        self.refill_per_second = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+class MongoWindowLimiter:
+    """Fixed one-minute window counters shared by every replica (TTL-expired)"""
+
+    def __init__(self, capacity, per_minute):
+        # A full burst is allowed within any single window
+        self.limit = max(capacity, int(per_minute))
+
+    def allow(self, key):
+        window = int(time.time() // 60)
+        counter = db.get_collection(LOGIN_ATTEMPTS_COLLECTION).find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {"$inc": {"count": 1},
+             "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(minutes=2)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["count"] <= self.limit
+
+def _make_limiter(capacity, per_minute):
+    if LOGIN_RATE_LIMIT_BACKEND == "mongo":
+        return MongoWindowLimiter(capacity, per_minute)
+    return TokenBucketLimiter(capacity, per_minute)
+
+email_limiter = _make_limiter(LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE)
+client_limiter = _make_limiter(LOGIN_CLIENT_BURST, LOGIN_CLIENT_PER_MINUTE)
+
+def client_key():
+    """Client identity: the socket address, or the address our trusted proxies saw"""
+    try:
+        if TRUSTED_PROXY_COUNT:
+            # Each trusted proxy appends the address it received from, so the entry
+            # TRUSTED_PROXY_COUNT hops from the right is the first one a client can't forge
+            hops = [hop.strip() for hop in (st.context.headers.get("X-Forwarded-For") or "").split(",") if hop.strip()]
+            if len(hops) >= TRUSTED_PROXY_COUNT:
+                return hops[-TRUSTED_PROXY_COUNT]
+        return st.context.ip_address or "unknown"
+    except Exception:
+        return "unknown"
+
+def login_allowed(email, client=None):
+    """Consume one attempt for this email and client; False means reject before bcrypt"""
+    client_ok = client_limiter.allow(f"client:{client or client_key()}")
+    email_ok = email_limiter.allow(f"email:{(email or '').strip().lower()}")
+    return client_ok and email_ok
@@ -0,0 +1,125 @@
+# utils/search.py
+import math
+import re
+from collections import Counter, defaultdict
+from pymongo.errors import OperationFailure
+from database.connection import db
+from config import CONSULTATIONS_COLLECTION, SEARCH_BACKEND, SEARCH_INDEX_TTL_SECONDS
+from utils.cache import TTLCache
+from utils.pagination import DEFAULT_PAGE_SIZE
+from utils.projections import CONSULTATION_SEARCH_RESULT
+
+SEARCH_FIELDS = ["symptoms", "diagnosis", "prescription", "consultation_notes"]
+# Same weights as the consultation_text index
+SEARCH_WEIGHTS = {"diagnosis": 4, "symptoms": 3, "prescription": 2, "consultation_notes": 1}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+def _scope_filter(doctor_id=None, patient_id=None):
+    if doctor_id is None and patient_id is None:
+        raise ValueError("search must be scoped to a doctor_id or patient_id")
+    scope = {}
+    if doctor_id is not None:
+        scope["doctor_id"] = doctor_id
+    if patient_id is not None:
+        scope["patient_id"] = patient_id
+    return scope
+
+# =============================================
+# MONGODB TEXT INDEX
+# =============================================
+
+def _text_search(query, scope, page_size, offset):
+    consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+    cursor = consultations_collection.find(
+        {"$text": {"$search": query}, **scope},
+        {**CONSULTATION_SEARCH_RESULT, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"}), ("created_at", -1)]).skip(offset).limit(page_size + 1)
+    return list(cursor)
+
+# =============================================
+# IN-PROCESS INVERTED INDEX (fallback)
+# =============================================
+
+class InvertedIndex:
+    """Weighted TF-IDF over the consultation text fields of one scope"""
+
+    def __init__(self, consultations):
+        self.documents = {}
+        self.postings = defaultdict(dict)
+        for consult in consultations:
+            self.documents[consult["_id"]] = consult
+            weighted_terms = Counter()
+            for field in SEARCH_FIELDS:
+                for token in tokenize(consult.get(field)):
+                    weighted_terms[token] += SEARCH_WEIGHTS[field]
+            for token, weight in weighted_terms.items():
+                self.postings[token][consult["_id"]] = weight
+
+    def search(self, query):
+        scores = Counter()
+        total = len(self.documents) or 1
+        for token in set(tokenize(query)):
+            matches = self.postings.get(token, {})
+            if not matches:
+                continue
+            idf = math.log(1 + total / len(matches))
+            for consult_id, weight in matches.items():
+                scores[consult_id] += (1 + math.log(weight)) * idf
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -self.documents[item[0]]["created_at"].timestamp()))
+        return [{**self.documents[consult_id], "score": score} for consult_id, score in ranked]
+
+# (scope key) -> InvertedIndex, rebuilt after SEARCH_INDEX_TTL_SECONDS
+_memory_indexes = TTLCache(max_entries=256, ttl_seconds=SEARCH_INDEX_TTL_SECONDS)
+
+def _memory_index(scope):
+    def build():
+        consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+        return InvertedIndex(consultations_collection.find(scope, CONSULTATION_SEARCH_RESULT))
+    return _memory_indexes.get_or_load(tuple(sorted(scope.items())), build)
+
+def _memory_search(query, scope, page_size, offset):
+    return _memory_index(scope).search(query)[offset:offset + page_size + 1]
+
+def invalidate_search_index(doctor_id=None, patient_id=None):
+    """Drop cached fallback indexes (all of them when called without a scope)"""
+    if doctor_id is None and patient_id is None:
+        _memory_indexes.invalidate()
+    if doctor_id is not None:
+        _memory_indexes.invalidate((("doctor_id", doctor_id),))
+    if patient_id is not None:
+        _memory_indexes.invalidate((("patient_id", patient_id),))
+
+# =============================================
+# PUBLIC API
+# =============================================
+
+def search_consultations(query, doctor_id=None, patient_id=None, page_size=DEFAULT_PAGE_SIZE, after=None):
+    """
+    Relevance-ranked consultation search scoped to a doctor and/or patient.
+
+    Follows the pagination contract of utils.pagination.find_page: returns
+    (results, next_cursor) where the cursor is the offset of the next page.
+    """
+    scope = _scope_filter(doctor_id, patient_id)
+    offset = after or 0
+    if not tokenize(query):
+        return [], None
+
+    if SEARCH_BACKEND == "memory":
+        results = _memory_search(query, scope, page_size, offset)
+    else:
+        try:
+            results = _text_search(query, scope, page_size, offset)
+        except OperationFailure:
+            # No text index (or text search unsupported by this server)
+            if SEARCH_BACKEND == "text":
+                raise
+            results = _memory_search(query, scope, page_size, offset)
+
+    if len(results) <= page_size:
+        return results, None
+    return results[:page_size], offset + page_size
@@ -0,0 +1,160 @@
+# utils/sessions.py
+"""
+HMAC-signed, expiring session tokens kept in the "session" query parameter,
+so a refresh, websocket reconnect or pod restart resumes the login without
+another bcrypt verification.
+
+Token: base64url(json payload) + "." + base64url(HMAC-SHA256(payload)).
+Revocation goes through the sessions collection (TTL-indexed on expires_at).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from datetime import datetime, timedelta
+import streamlit as st
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from database.connection import db
+from config import (
+    USERS_COLLECTION, SESSIONS_COLLECTION, SETTINGS_COLLECTION,
+    SESSION_SECRET, SESSION_TTL_HOURS, SESSION_CACHE_TTL_SECONDS
+)
+from utils.cache import TTLCache
+
+SESSION_QUERY_PARAM = "session"
+USER_SESSION_PROJECTION = {"name": 1, "user_type": 1}
+
+# session id -> user record (None when revoked / unknown); short TTL bounds
+# how long a revocation made on another replica takes to apply here
+_session_cache = TTLCache(max_entries=10000, ttl_seconds=SESSION_CACHE_TTL_SECONDS)
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+@st.cache_resource(show_spinner=False)
+def _signing_key():
+    if SESSION_SECRET:
+        return SESSION_SECRET.encode("utf-8")
+    # Shared by every replica: first one to start generates it
+    settings = db.get_collection(SETTINGS_COLLECTION).find_one_and_update(
+        {"_id": "session_secret"},
+        {"$setOnInsert": {"value": secrets.token_hex(32), "created_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return settings["value"].encode("utf-8")
+
+def _sign(payload):
+    return hmac.new(_signing_key(), payload, hashlib.sha256).digest()
+
+def issue_session_token(user):
+    session_id = secrets.token_urlsafe(16)
+    expires_at = datetime.utcnow() + timedelta(hours=SESSION_TTL_HOURS)
+    db.get_collection(SESSIONS_COLLECTION).insert_one({
+        "_id": session_id,
+        "user_id": user["_id"],
+        "created_at": datetime.utcnow(),
+        "expires_at": expires_at,
+        "revoked": False
+    })
+
+    payload = json.dumps({
+        "sid": session_id,
+        "uid": str(user["_id"]),
+        "exp": int(time.time()) + SESSION_TTL_HOURS * 3600
+    }, separators=(",", ":")).encode("utf-8")
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+def _decode_token(token):
+    """Return the payload of a correctly signed, unexpired token, else None"""
+    try:
+        encoded_payload, encoded_signature = token.split(".", 1)
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, AttributeError):
+        return None
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(payload)
+    except ValueError:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+def _load_session_user(session_id, user_id):
+    session = db.get_collection(SESSIONS_COLLECTION).find_one(
+        {"_id": session_id, "user_id": user_id, "revoked": False, "expires_at": {"$gt": datetime.utcnow()}},
+        {"_id": 1}
+    )
+    if not session:
+        return None
+    return db.get_collection(USERS_COLLECTION).find_one({"_id": user_id}, USER_SESSION_PROJECTION)
+
+def resume_session(token):
+    """User record for a valid, unrevoked token (signature checked before any DB work)"""
+    claims = _decode_token(token)
+    if not claims:
+        return None
+    try:
+        user_id = ObjectId(claims["uid"])
+    except (InvalidId, KeyError, TypeError):
+        return None
+    return _session_cache.get_or_load(claims["sid"], lambda: _load_session_user(claims["sid"], user_id))
+
+def revoke_session(token):
+    claims = _decode_token(token)
+    if not claims:
+        return
+    db.get_collection(SESSIONS_COLLECTION).update_one({"_id": claims["sid"]}, {"$set": {"revoked": True}})
+    _session_cache.invalidate(claims["sid"])
+
+def revoke_user_sessions(user_id):
+    db.get_collection(SESSIONS_COLLECTION).update_many({"user_id": user_id}, {"$set": {"revoked": True}})
+    _session_cache.invalidate()
+
+# =============================================
+# STREAMLIT SESSION STATE
+# =============================================
+
+def _set_logged_in(user):
+    st.session_state.logged_in = True
+    st.session_state.user_id = user["_id"]
+    st.session_state.user_type = user["user_type"]
+    st.session_state.user_name = user["name"]
+
+def start_session(user):
+    """Mark the Streamlit session as logged in and hand the browser a resumption token"""
+    _set_logged_in(user)
+    st.query_params[SESSION_QUERY_PARAM] = issue_session_token(user)
+
+def restore_session():
+    """Resume a login from the session query parameter; returns True when resumed"""
+    token = st.query_params.get(SESSION_QUERY_PARAM)
+    if not token:
+        return False
+    user = resume_session(token)
+    if not user:
+        del st.query_params[SESSION_QUERY_PARAM]
+        return False
+    _set_logged_in(user)
+    return True
+
+def end_session():
+    token = st.query_params.get(SESSION_QUERY_PARAM)
+    if token:
+        revoke_session(token)
+        del st.query_params[SESSION_QUERY_PARAM]
+    st.session_state.logged_in = False
+    st.session_state.user_id = None
+    st.session_state.user_type = None
+    st.session_state.user_name = None
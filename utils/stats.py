@@ -0,0 +1,102 @@
+# utils/stats.py
+from datetime import datetime, timedelta
+from database.connection import db
+from config import USERS_COLLECTION, CONSULTATIONS_COLLECTION, STATS_COLLECTION, MATERIALIZED_STATS
+
+GLOBAL_STATS_ID = "global"
+
+def compute_stats(database=db):
+    """All admin counters in a single $facet aggregation over users + consultations"""
+    users_collection = database.get_collection(USERS_COLLECTION)
+    pipeline = [
+        {"$project": {"_id": 0, "user_type": 1}},
+        {"$unionWith": {
+            "coll": CONSULTATIONS_COLLECTION,
+            "pipeline": [{"$project": {"_id": 0, "status": 1, "is_consultation": {"$literal": True}}}]
+        }},
+        {"$facet": {
+            "users_by_type": [
+                {"$match": {"is_consultation": {"$exists": False}}},
+                {"$group": {"_id": "$user_type", "count": {"$sum": 1}}}
+            ],
+            "consultations_by_status": [
+                {"$match": {"is_consultation": True}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+    facets = next(users_collection.aggregate(pipeline), {})
+
+    users_by_type = {row["_id"]: row["count"] for row in facets.get("users_by_type", []) if row["_id"]}
+    consultations_by_status = {row["_id"]: row["count"] for row in facets.get("consultations_by_status", []) if row["_id"]}
+    return {
+        "users_total": sum(users_by_type.values()),
+        "users_by_type": users_by_type,
+        "consultations_total": sum(consultations_by_status.values()),
+        "consultations_by_status": consultations_by_status,
+    }
+
+def rebuild_stats(database=db):
+    """Recompute the materialized stats document from scratch"""
+    stats = compute_stats(database)
+    database.get_collection(STATS_COLLECTION).replace_one(
+        {"_id": GLOBAL_STATS_ID},
+        {**stats, "rebuilt_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+        upsert=True
+    )
+    return stats
+
+def get_dashboard_stats():
+    """Admin statistics: O(1) read of the stats document, or the $facet aggregation"""
+    if not MATERIALIZED_STATS:
+        return compute_stats()
+    stats = db.get_collection(STATS_COLLECTION).find_one({"_id": GLOBAL_STATS_ID})
+    return stats or rebuild_stats()
+
+def _increment(counters):
+    if not MATERIALIZED_STATS:
+        return
+    db.get_collection(STATS_COLLECTION).update_one(
+        {"_id": GLOBAL_STATS_ID},
+        {"$inc": counters, "$set": {"updated_at": datetime.utcnow()}}
+    )  # no upsert: a missing document is rebuilt in full by get_dashboard_stats
+
+def record_user_registered(user_type):
+    _increment({"users_total": 1, f"users_by_type.{user_type}": 1})
+
+def record_consultation_created(status="pending"):
+    _increment({"consultations_total": 1, f"consultations_by_status.{status}": 1})
+
+def record_status_change(old_status, new_status):
+    if old_status != new_status:
+        _increment({f"consultations_by_status.{old_status}": -1, f"consultations_by_status.{new_status}": 1})
+
+def get_doctor_summary(doctor_id):
+    """Per-doctor counts by status, average turnaround and oldest pending request"""
+    consultations_collection = db.get_collection(CONSULTATIONS_COLLECTION)
+    pipeline = [
+        {"$match": {"doctor_id": doctor_id}},
+        {"$group": {
+            "_id": "$status",
+            "count": {"$sum": 1},
+            "oldest_created_at": {"$min": "$created_at"},
+            # $avg ignores nulls, so only completed consultations contribute
+            "turnaround_ms": {"$avg": {"$cond": [
+                {"$eq": ["$status", "completed"]},
+                {"$subtract": ["$updated_at", "$created_at"]},
+                None
+            ]}}
+        }}
+    ]
+    rows = list(consultations_collection.aggregate(pipeline))
+
+    by_status = {row["_id"]: row["count"] for row in rows}
+    completed = next((row for row in rows if row["_id"] == "completed"), None)
+    pending = next((row for row in rows if row["_id"] == "pending"), None)
+    turnaround_ms = completed["turnaround_ms"] if completed else None
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "avg_turnaround": timedelta(milliseconds=turnaround_ms) if turnaround_ms is not None else None,
+        "oldest_pending": pending["oldest_created_at"] if pending else None,
+    }